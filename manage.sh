@@ -39,7 +39,7 @@ start() {
     echo "启动服务 (端口 $SERVER_PORT)..."
     cd "$SCRIPT_DIR/server"
     mkdir -p "$LOG_DIR"
-    nohup python -m uvicorn main:app --host 0.0.0.0 --port $SERVER_PORT > "$LOG_DIR/server.log" 2>&1 &
+    nohup python -m uvicorn main:app --host 0.0.0.0 --port $SERVER_PORT --loop uvloop --http httptools > "$LOG_DIR/server.log" 2>&1 &
     sleep 3
     if lsof -i :$SERVER_PORT > /dev/null 2>&1; then
         echo "✓ 服务已启动"
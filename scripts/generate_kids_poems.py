@@ -1,6 +1,14 @@
 """生成适合幼儿的古诗（带拼音和简单解释）"""
 
 import os
+import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+# 只需要单字拼音，跳过词组库加载；拼音字典只读，跳过导入时的字典拷贝
+os.environ.setdefault('PYPINYIN_NO_PHRASES', 'true')
+os.environ.setdefault('PYPINYIN_NO_DICT_COPY', 'true')
+
 from pypinyin import pinyin, Style
 
 # 适合3-6岁幼儿的经典古诗（手动整理）
@@ -56,30 +64,50 @@ KIDS_POEMS = [
 ]
 
 
+# 汉字（CJK 基本区）
+_CJK_RE = re.compile(r'[\u4e00-\u9fff]')
+
+
+def build_pinyin_cache(poems):
+    """一次性生成所有古诗汉字的拼音表（汉字 -> 带声调拼音）"""
+    text = "".join(poem["content"] for poem in poems)
+    chars = _CJK_RE.findall(text)
+    # 一次批量调用，非汉字被忽略，结果与 chars 一一对应
+    readings = pinyin(text, style=Style.TONE, heteronym=False, errors='ignore')
+    cache = {}
+    for char, py in zip(chars, readings):
+        cache.setdefault(char, py[0])
+    return cache
+
+
+PY_CACHE = build_pinyin_cache(KIDS_POEMS)
+
+# 诗句：以标点结尾的一段（末尾不带标点的残句也保留）
+_LINE_RE = re.compile(r'[^。，！？]+[。，！？]?')
+
+
+def get_char_pinyin(char):
+    """查单字拼音，缓存里没有时再调用 pypinyin"""
+    py = PY_CACHE.get(char)
+    if py is None:
+        py = PY_CACHE[char] = pinyin(char, style=Style.TONE)[0][0]
+    return py
+
+
 def add_pinyin_line(text):
     """给一行文字添加拼音（只给汉字加）"""
-    result = []
-    for char in text:
-        if '\u4e00' <= char <= '\u9fff':  # 是汉字
-            py = pinyin(char, style=Style.TONE)[0][0]
-            result.append(f"{char}({py})")
-        else:
-            result.append(char)
-    return ''.join(result)
+    return _CJK_RE.sub(lambda m: f"{m.group()}({get_char_pinyin(m.group())})", text)
 
 
 def split_poem_lines(content):
     """把诗分成行"""
-    lines = []
-    current = ""
-    for char in content:
-        current += char
-        if char in "。，！？":
-            lines.append(current)
-            current = ""
-    if current:
-        lines.append(current)
-    return lines
+    return _LINE_RE.findall(content)
+
+
+def write_file(filepath, text):
+    """一次编码后以二进制写出整个文件（绕过 TextIOWrapper，写不完时由 BufferedWriter 继续写）"""
+    with open(filepath, "wb") as f:
+        f.write(text.encode("utf-8"))
 
 
 def generate_poem_file(poem, output_dir):
@@ -91,26 +119,15 @@ def generate_poem_file(poem, output_dir):
 
     lines = split_poem_lines(content)
 
-    # 生成 Markdown
-    md = f"""---
-bgm: null
----
-
-# {title}
-
-{author}
-
-"""
-    for line in lines:
-        md += f"{line}\n\n"
-
-    md += f"---\n\n**讲给宝宝听**\n\n{explanation}\n"
+    # 生成 Markdown（先拼好各段，最后一次 join）
+    parts = ["---\nbgm: null\n---\n\n# ", title, "\n\n", author, "\n\n"]
+    parts.extend(f"{line}\n\n" for line in lines)
+    parts.append(f"---\n\n**讲给宝宝听**\n\n{explanation}\n")
 
     filepath = os.path.join(output_dir, f"{title}.md")
-    with open(filepath, "w", encoding="utf-8") as f:
-        f.write(md)
+    write_file(filepath, "".join(parts))
 
-    print(f"  {title}")
+    return title
 
 
 def main():
@@ -118,17 +135,18 @@ def main():
         os.path.dirname(os.path.dirname(__file__)),
         "server", "skills", "poetry", "poems"
     )
+    # 清空（整个目录删掉重建）
+    shutil.rmtree(output_dir, ignore_errors=True)
     os.makedirs(output_dir, exist_ok=True)
 
-    # 清空
-    for f in os.listdir(output_dir):
-        if f.endswith('.md'):
-            os.remove(os.path.join(output_dir, f))
-
     print(f"生成 {len(KIDS_POEMS)} 首幼儿古诗...\n")
 
-    for poem in KIDS_POEMS:
-        generate_poem_file(poem, output_dir)
+    # 每首诗互不依赖，并发生成；结果按原顺序输出，避免多线程打印交错
+    with ThreadPoolExecutor(max_workers=min(8, len(KIDS_POEMS))) as executor:
+        titles = list(executor.map(lambda poem: generate_poem_file(poem, output_dir), KIDS_POEMS))
+
+    for title in titles:
+        print(f"  {title}")
 
     print(f"\n完成！")
 
@@ -2,13 +2,41 @@
 
 import os
 import re
+import shutil
+import json
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from functools import lru_cache
 from opencc import OpenCC
 
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
 cc = OpenCC('t2s')
 
 TANG_300_URL = "https://raw.githubusercontent.com/chinese-poetry/chinese-poetry/master/蒙学/tangshisanbaishou.json"
 
+# 下载缓存（一天内直接复用，过期后用 ETag 校验是否有更新）
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+CACHE_FILE = os.path.join(CACHE_DIR, "tangshisanbaishou.json")
+CACHE_ETAG_FILE = f"{CACHE_FILE}.etag"
+CACHE_TTL = 24 * 3600
+
+# 复用连接（TLS 会话 + 连接池），以后增加更多数据源时同样受益
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+
+# 文件名非法字符、诗句中的"一作"异文注释
+UNSAFE_FILENAME_RE = re.compile(r'[/\\:*?"<>|·]')
+YIZUO_RE = re.compile(r'\([^)]*一作[^)]*\)')
+
+# 批量转换诗句时使用的分隔符（不会出现在诗句中）
+PARA_SEP = '\x1f'
+
 # 幼儿启蒙古诗（3-6岁，简单易懂）
 YOUER_POEMS = [
     "靜夜思",   # 床前明月光
@@ -20,11 +48,38 @@ YOUER_POEMS = [
 ]
 
 
+def load_cached_poems():
+    with open(CACHE_FILE, "rb") as f:
+        return json_loads(f.read())
+
+
 def download_poems():
+    if os.path.exists(CACHE_FILE) and time.time() - os.path.getmtime(CACHE_FILE) < CACHE_TTL:
+        print("使用本地缓存的唐诗三百首...")
+        return load_cached_poems()
+
+    headers = {}
+    if os.path.exists(CACHE_FILE) and os.path.exists(CACHE_ETAG_FILE):
+        with open(CACHE_ETAG_FILE, "r", encoding="utf-8") as f:
+            headers["If-None-Match"] = f.read().strip()
+
     print("下载唐诗三百首...")
-    resp = requests.get(TANG_300_URL, timeout=30)
+    resp = SESSION.get(TANG_300_URL, headers=headers, timeout=30)
+    if resp.status_code == 304:
+        # 远端未变化，刷新缓存时间
+        os.utime(CACHE_FILE)
+        return load_cached_poems()
     resp.raise_for_status()
-    return resp.json()
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(CACHE_FILE, "wb") as f:
+        f.write(resp.content)
+    etag = resp.headers.get("ETag")
+    if etag:
+        with open(CACHE_ETAG_FILE, "w", encoding="utf-8") as f:
+            f.write(etag)
+
+    return json_loads(resp.content)
 
 
 def extract_all_poems(data):
@@ -35,24 +90,33 @@ def extract_all_poems(data):
     return all_poems
 
 
-def is_youer_poem(title):
-    """精确匹配，避免"相思"匹配到"长相思" """
-    for t in YOUER_POEMS:
-        if t == title or title == cc.convert(t):
-            return True
-    return False
-
-
+@lru_cache(maxsize=4096)
 def to_simplified(text):
+    # 标题、作者名大量重复，缓存转换结果
     return cc.convert(text)
 
 
+# 繁体原名 + 简体名，预先计算好用于 O(1) 查找（同时预热转换缓存）
+YOUER_TITLES = frozenset(YOUER_POEMS) | frozenset(to_simplified(t) for t in YOUER_POEMS)
+
+
+def is_youer_poem(title):
+    """精确匹配，避免"相思"匹配到"长相思" """
+    return title in YOUER_TITLES
+
+
 def sanitize_filename(title):
     result = to_simplified(title)
-    result = re.sub(r'[/\\:*?"<>|·]', '', result)
+    result = UNSAFE_FILENAME_RE.sub('', result)
     return result
 
 
+def write_file(filepath, text):
+    """一次编码后以二进制写出整个文件（绕过 TextIOWrapper，写不完时由 BufferedWriter 继续写）"""
+    with open(filepath, "wb") as f:
+        f.write(text.encode("utf-8"))
+
+
 def convert_to_markdown(poem):
     title = poem.get("chapter", "无题")
     author = poem.get("author", "佚名")
@@ -72,10 +136,10 @@ bgm: null
 {author_simp}
 
 """
-    for para in paragraphs:
-        clean_para = re.sub(r'\([^)]*一作[^)]*\)', '', para)
-        clean_para = to_simplified(clean_para.strip())
-        content += f"{clean_para}\n\n"
+    # 所有诗句拼起来一次性转简体，再按分隔符拆回
+    cleaned = [YIZUO_RE.sub('', para).strip() for para in paragraphs]
+    simplified = cc.convert(PARA_SEP.join(cleaned)).split(PARA_SEP)
+    content += "".join(f"{para}\n\n" for para in simplified)
 
     return filename, content, title_simp
 
@@ -85,25 +149,24 @@ def main():
         os.path.dirname(os.path.dirname(__file__)),
         "server", "skills", "poetry", "poems"
     )
+    # 清空（整个目录删掉重建）
+    shutil.rmtree(output_dir, ignore_errors=True)
     os.makedirs(output_dir, exist_ok=True)
 
-    # 清空
-    for f in os.listdir(output_dir):
-        if f.endswith('.md'):
-            os.remove(os.path.join(output_dir, f))
-
     data = download_poems()
     poems = extract_all_poems(data)
     print(f"共 {len(poems)} 首诗")
 
-    # 筛选
-    youer_poems = []
-    seen = set()
+    # 筛选（同名只保留第一首，dict 保持插入顺序）
+    youer_map = {}
     for poem in poems:
         title = poem.get("chapter", "")
-        if is_youer_poem(title) and title not in seen:
-            seen.add(title)
-            youer_poems.append(poem)
+        if is_youer_poem(title):
+            youer_map.setdefault(title, poem)
+            # 目标诗都找到了，不必再扫剩下的诗
+            if len(youer_map) == len(YOUER_POEMS):
+                break
+    youer_poems = list(youer_map.values())
 
     print(f"筛选出 {len(youer_poems)} 首幼儿启蒙古诗")
 
@@ -111,8 +174,7 @@ def main():
     for poem in youer_poems:
         filename, content, title = convert_to_markdown(poem)
         filepath = os.path.join(output_dir, f"{filename}.md")
-        with open(filepath, "w", encoding="utf-8") as f:
-            f.write(content)
+        write_file(filepath, content)
         print(f"  {title}")
 
     print(f"\n完成！共 {len(youer_poems)} 首")
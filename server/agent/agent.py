@@ -7,8 +7,10 @@
 """
 
 from typing import Any
+from collections import OrderedDict
 from datetime import datetime
 from langchain_openai import ChatOpenAI
+from langchain_core.messages import SystemMessage
 from langchain_core.tools import tool
 from langgraph.prebuilt import create_react_agent
 from config import get_settings
@@ -22,12 +24,23 @@ from .skills_loader import (
     get_skills_summary,
     load_skill_content,
     get_skill_registry,
+    get_registry_version,
 )
 
 settings = get_settings()
 
-# Agent 缓存（按配置缓存）
-_agent_cache: dict[str, Any] = {}
+# Agent 缓存（按配置缓存，LRU 淘汰，避免无限增长）
+_agent_cache: OrderedDict[str, Any] = OrderedDict()
+MAX_AGENT_CACHE_SIZE = 8
+
+# 系统提示词缓存（按助手名字和技能注册表版本缓存，LRU 淘汰；当前时间由 build_time_section 在每次调用模型时拼接）
+_prompt_cache: OrderedDict[tuple[str, int], str] = OrderedDict()
+MAX_PROMPT_CACHE_SIZE = 8
+
+WEEKDAY_NAMES = ["星期一", "星期二", "星期三", "星期四", "星期五", "星期六", "星期日"]
+
+# 技能是否已发现（只在首次构建提示词或 reload_agent 时扫描目录）
+_discovered = False
 
 
 # 动态技能加载工具（仅在需要详细了解技能时使用）
@@ -58,24 +71,44 @@ def load_skill(skill_id: str) -> str:
 技能已加载，你现在可以使用该技能的工具了。"""
 
 
+# Agent 工具：包含技能加载工具 + 各技能的具体工具
+AGENT_TOOLS = (
+    load_skill,      # 技能加载工具
+    tell_story,      # 讲故事工具
+    list_stories,    # 列出故事工具
+    recite_poem,     # 朗诵古诗工具
+    list_poems,      # 列出古诗工具
+    play_song,       # 播放儿歌工具
+    pause_song,      # 暂停儿歌工具
+    resume_song,     # 继续播放工具
+    stop_song,       # 停止播放工具
+    next_song,       # 下一首工具
+    list_songs,      # 列出儿歌工具
+)
+
+
+def ensure_skills_discovered() -> None:
+    """发现技能（每个进程只扫描一次，reload_agent 后重新扫描）"""
+    global _discovered
+    if not _discovered:
+        discover_skills()
+        _discovered = True
+
+
 def build_system_prompt(assistant_name: str = "小智") -> str:
-    """构建系统提示词，包含技能摘要和当前时间"""
-    # 发现技能
-    discover_skills()
+    """构建系统提示词，包含技能摘要"""
+    ensure_skills_discovered()
+
+    # 技能重新加载后注册表版本号变化，旧的提示词自动失效
+    cache_key = (assistant_name, get_registry_version())
+    if cache_key in _prompt_cache:
+        _prompt_cache.move_to_end(cache_key)
+        return _prompt_cache[cache_key]
 
     # 获取技能摘要
     skills_summary = get_skills_summary()
 
-    # 获取当前时间
-    now = datetime.now()
-    current_time = now.strftime("%Y年%m月%d日 %H:%M")
-    weekday_names = ["星期一", "星期二", "星期三", "星期四", "星期五", "星期六", "星期日"]
-    weekday = weekday_names[now.weekday()]
-
-    return f"""你是一个友好的语音助手，名字叫"{assistant_name}"，专门为小朋友服务。
-
-## 当前时间
-{current_time} {weekday}
+    prompt = f"""你是一个友好的语音助手，名字叫"{assistant_name}"，专门为小朋友服务。
 
 ## 你的特点
 - 语言温柔、有耐心
@@ -175,6 +208,19 @@ def build_system_prompt(assistant_name: str = "小智") -> str:
 **正确示例**：
 - "好的，现在给你播放《小星星》！" ← 然后停止，不要再输出任何内容"""
 
+    _prompt_cache[cache_key] = prompt
+    if len(_prompt_cache) > MAX_PROMPT_CACHE_SIZE:
+        _prompt_cache.popitem(last=False)
+    return prompt
+
+
+def build_time_section() -> str:
+    """构建系统提示词中的当前时间部分（每次调用模型时生成，不影响 Agent 缓存）"""
+    now = datetime.now()
+    current_time = now.strftime("%Y年%m月%d日 %H:%M")
+    weekday = WEEKDAY_NAMES[now.weekday()]
+    return f"## 当前时间\n{current_time} {weekday}"
+
 
 def create_agent(
     model: str | None = None,
@@ -200,29 +246,19 @@ def create_agent(
         max_tokens=max_tokens,
     )
 
-    # 定义工具：包含技能加载工具 + 各技能的具体工具
-    tools = [
-        load_skill,      # 技能加载工具
-        tell_story,      # 讲故事工具
-        list_stories,    # 列出故事工具
-        recite_poem,     # 朗诵古诗工具
-        list_poems,      # 列出古诗工具
-        play_song,       # 播放儿歌工具
-        pause_song,      # 暂停儿歌工具
-        resume_song,     # 继续播放工具
-        stop_song,       # 停止播放工具
-        next_song,       # 下一首工具
-        list_songs,      # 列出儿歌工具
-    ]
-
     # 构建系统提示词（包含技能摘要和助手名字）
     system_prompt = build_system_prompt(assistant_name or "小智")
 
+    def prompt(state: dict) -> list:
+        """缓存的系统提示词加上当前时间，合成唯一一条系统消息"""
+        system_message = SystemMessage(content=f"{system_prompt}\n\n{build_time_section()}")
+        return [system_message, *state["messages"]]
+
     # 使用 LangGraph 创建 ReAct Agent
     agent = create_react_agent(
         model=llm,
-        tools=tools,
-        prompt=system_prompt,
+        tools=list(AGENT_TOOLS),
+        prompt=prompt,
     )
 
     return agent
@@ -244,18 +280,30 @@ def get_agent(
     """
     global _agent_cache
 
-    # 构建缓存键（包含助手名字和当前小时，确保时间相对准确）
-    current_hour = datetime.now().strftime("%Y%m%d%H")
-    cache_key = f"{model or 'default'}:{temperature}:{max_tokens}:{assistant_name or 'default'}:{current_hour}"
+    # 构建缓存键（当前时间不再参与，见 build_time_section；
+    # 包含技能注册表版本号，/skills/reload 后自动使用新的系统提示词重建 Agent）
+    ensure_skills_discovered()
+    cache_key = (
+        f"{model or 'default'}:{temperature}:{max_tokens}:{assistant_name or 'default'}"
+        f":{get_registry_version()}"
+    )
+
+    if cache_key in _agent_cache:
+        _agent_cache.move_to_end(cache_key)
+        return _agent_cache[cache_key]
 
-    if cache_key not in _agent_cache:
-        _agent_cache[cache_key] = create_agent(model, temperature, max_tokens, assistant_name)
+    agent = create_agent(model, temperature, max_tokens, assistant_name)
+    _agent_cache[cache_key] = agent
+    if len(_agent_cache) > MAX_AGENT_CACHE_SIZE:
+        _agent_cache.popitem(last=False)
 
-    return _agent_cache[cache_key]
+    return agent
 
 
 def reload_agent() -> Any:
     """重新加载所有 Agent（技能更新后调用）"""
-    global _agent_cache
+    global _agent_cache, _discovered
     _agent_cache.clear()
+    _prompt_cache.clear()
+    _discovered = False
     return get_agent()
@@ -4,14 +4,24 @@
 用于在 Agent 之前预处理，实现故事直接读取等优化。
 """
 
-import json
+import os
 import re
+import logging
+import httpx
+import orjson
+from functools import lru_cache
 from typing import Literal
 from pydantic import BaseModel
 from langchain_openai import ChatOpenAI
 from config import get_settings
 
+try:
+    import ahocorasick
+except ImportError:  # 未安装 pyahocorasick 时退回到预编译正则
+    ahocorasick = None
+
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 
 class StoryIntent(BaseModel):
@@ -129,16 +139,40 @@ INTENT_PROMPT = """你是一个意图识别助手。分析用户输入，判断
 """
 
 
+def extract_json(text: str) -> str | None:
+    """提取文本中第一个完整的 JSON 对象（按括号深度匹配，支持嵌套和字符串内的括号）"""
+    start = text.find("{")
+    if start < 0:
+        return None
+
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
+
+
 def parse_intent_response(response: str) -> Intent:
     """解析 LLM 返回的意图 JSON"""
     try:
-        # 尝试提取 JSON
-        # 可能返回 ```json ... ``` 格式
-        json_match = re.search(r'\{[^{}]+\}', response)
-        if json_match:
-            data = json.loads(json_match.group())
-        else:
-            data = json.loads(response)
+        # 可能返回 ```json ... ``` 格式，先提取 JSON 对象
+        data = orjson.loads(extract_json(response) or response)
 
         intent_type = data.get("intent", "chat")
 
@@ -167,11 +201,106 @@ def parse_intent_response(response: str) -> Intent:
         else:
             return ChatIntent(intent="chat")
 
-    except (json.JSONDecodeError, KeyError, ValueError):
+    except (orjson.JSONDecodeError, KeyError, ValueError, AttributeError):
         # 解析失败，默认为普通对话
         return ChatIntent(intent="chat")
 
 
+# 意图识别 LLM 客户端缓存（按模型名），复用连接池
+_LLM_CACHE: dict[str, ChatOpenAI] = {}
+
+
+def get_intent_llm(model: str | None = None) -> ChatOpenAI:
+    """获取意图识别用的 LLM 客户端（按模型缓存，进程内复用）"""
+    model_key = model or settings.OPENAI_MODEL
+    llm = _LLM_CACHE.get(model_key)
+    if llm is None:
+        llm = ChatOpenAI(
+            model=model_key,
+            openai_api_key=settings.OPENAI_API_KEY,
+            openai_api_base=settings.OPENAI_BASE_URL,
+            temperature=0,  # 意图识别需要确定性
+            max_tokens=100,  # 只需要返回简短 JSON
+            http_async_client=httpx.AsyncClient(
+                limits=httpx.Limits(max_keepalive_connections=64, keepalive_expiry=60),
+            ),
+        )
+        _LLM_CACHE[model_key] = llm
+    return llm
+
+
+# 本地意图分类模型（可选，fastText）
+# 模型按字切分训练，标签形如 __label__chat；未配置 INTENT_MODEL_PATH 时不启用
+_local_model = None
+_local_model_loaded = False
+
+# 本地模型可直接给出的意图（不需要提取名称）
+LOCAL_INTENT_CLASSES = {
+    "list_stories": ListStoriesIntent,
+    "pause_song": PauseSongIntent,
+    "resume_song": ResumeSongIntent,
+    "stop_song": StopSongIntent,
+    "next_song": NextSongIntent,
+    "list_songs": ListSongsIntent,
+    "chat": ChatIntent,
+}
+
+
+def get_local_intent_model():
+    """获取本地意图分类模型（首次调用时加载，失败或未配置时返回 None）"""
+    global _local_model, _local_model_loaded
+
+    if _local_model_loaded:
+        return _local_model
+    _local_model_loaded = True
+
+    model_path = settings.INTENT_MODEL_PATH
+    if not model_path:
+        return None
+    if not os.path.exists(model_path):
+        logger.warning("[Intent] 本地意图模型不存在: %s", model_path)
+        return None
+
+    try:
+        import fasttext
+    except ImportError:
+        logger.warning("[Intent] 未安装 fasttext，跳过本地意图模型")
+        return None
+
+    try:
+        _local_model = fasttext.load_model(model_path)
+        logger.info("[Intent] 已加载本地意图模型: %s", model_path)
+    except Exception as e:
+        logger.warning("[Intent] 加载本地意图模型失败: %s", e)
+    return _local_model
+
+
+def local_classify(user_input: str) -> Intent | None:
+    """
+    用本地模型分类意图
+
+    置信度低于阈值，或者是需要提取故事名/歌曲名的意图时返回 None，
+    由调用方继续交给 LLM 处理。
+    """
+    model = get_local_intent_model()
+    if model is None:
+        return None
+
+    chars = "".join(user_input.split())
+    if not chars:
+        return None
+
+    labels, probs = model.predict(" ".join(chars), k=1)
+    if not labels or probs[0] < settings.INTENT_MODEL_THRESHOLD:
+        return None
+
+    intent_type = labels[0].removeprefix("__label__")
+    intent_cls = LOCAL_INTENT_CLASSES.get(intent_type)
+    if intent_cls is None:
+        return None
+    return intent_cls(intent=intent_type)
+
+
 async def detect_intent(
     user_input: str,
     model: str | None = None,
@@ -186,22 +315,18 @@ async def detect_intent(
     Returns:
         Intent 对象
     """
-    # 使用轻量模型进行意图识别
-    llm = ChatOpenAI(
-        model=model or settings.OPENAI_MODEL,
-        openai_api_key=settings.OPENAI_API_KEY,
-        openai_api_base=settings.OPENAI_BASE_URL,
-        temperature=0,  # 意图识别需要确定性
-        max_tokens=100,  # 只需要返回简短 JSON
-    )
+    # 本地模型高置信度命中时不再请求 LLM
+    intent = local_classify(user_input)
+    if intent is not None:
+        return intent
 
     prompt = INTENT_PROMPT.format(user_input=user_input)
 
     try:
-        response = await llm.ainvoke(prompt)
+        response = await get_intent_llm(model).ainvoke(prompt)
         return parse_intent_response(response.content)
     except Exception as e:
-        print(f"[Intent] 意图识别失败: {e}")
+        logger.warning("[Intent] 意图识别失败: %s", e)
         # 出错时默认为普通对话，让 Agent 处理
         return ChatIntent(intent="chat")
 
@@ -218,25 +343,150 @@ RESUME_KEYWORDS = ["继续", "继续播放", "接着放", "继续唱"]
 STOP_KEYWORDS = ["停止", "不听了", "关掉", "停止播放", "不要了"]
 NEXT_KEYWORDS = ["下一首", "换一首", "换个歌", "换一个"]
 
-# 缓存已知故事名列表
-_story_titles_cache: list[str] | None = None
+# 明确指向故事的词：出现时不再按儿歌名兜底（如"讲小星星的故事"）
+STORY_WORDS = ("故事",)
+
+# 关键词分组（按优先级从高到低）
+KEYWORD_GROUPS = [
+    ("pause_song", PAUSE_KEYWORDS),
+    ("resume_song", RESUME_KEYWORDS),
+    ("stop_song", STOP_KEYWORDS),
+    ("next_song", NEXT_KEYWORDS),
+    ("list_songs", SONG_LIST_KEYWORDS),
+    ("list_stories", LIST_KEYWORDS),
+    ("song", SONG_KEYWORDS),
+    ("story", STORY_KEYWORDS),
+]
+
+
+def build_keyword_automaton():
+    """把所有关键词编译成一个 Aho-Corasick 自动机，值为 (优先级, 分组)"""
+    automaton = ahocorasick.Automaton(ahocorasick.STORE_ANY, ahocorasick.KEY_STRING)
+    for priority, (group, keywords) in enumerate(KEYWORD_GROUPS):
+        for kw in keywords:
+            existing = automaton.get(kw, None)
+            if existing is None or priority < existing[0]:
+                automaton.add_word(kw, (priority, group))
+    automaton.make_automaton()
+    return automaton
+
+
+def build_keyword_patterns() -> list[tuple[str, re.Pattern]]:
+    """每个分组编译成一个正则（关键词用 | 连接），按优先级排列"""
+    return [
+        (group, re.compile("|".join(re.escape(kw) for kw in keywords)))
+        for group, keywords in KEYWORD_GROUPS
+    ]
+
+
+if ahocorasick is not None:
+    _keyword_automaton = build_keyword_automaton()
+else:
+    _keyword_patterns = build_keyword_patterns()
+
+
+def match_keyword_group(text: str) -> str | None:
+    """一次扫描文本，返回命中的最高优先级关键词分组"""
+    if ahocorasick is None:
+        for group, pattern in _keyword_patterns:
+            if pattern.search(text):
+                return group
+        return None
+
+    best = None
+    for _, hit in _keyword_automaton.iter(text):
+        if best is None or hit[0] < best[0]:
+            best = hit
+            if best[0] == 0:
+                break
+    return best[1] if best else None
 
 
 def get_story_titles() -> list[str]:
-    """获取所有故事标题（用于快速匹配）"""
-    global _story_titles_cache
-    if _story_titles_cache is None:
-        try:
-            from agent.tools.storytelling import get_all_story_ids, load_story
-            story_ids = get_all_story_ids()
-            _story_titles_cache = []
-            for story_id in story_ids:
-                story = load_story(story_id)
-                if story:
-                    _story_titles_cache.append(story['title'])
-        except Exception:
-            _story_titles_cache = []
-    return _story_titles_cache
+    """获取所有故事标题（用于快速匹配，直接取故事索引，新增或修改的故事随索引刷新）"""
+    try:
+        from agent.tools.storytelling import get_story_index
+        return [story["title"] for story in get_story_index().values()]
+    except Exception:
+        return []
+
+
+def get_song_titles() -> list[str]:
+    """获取所有儿歌标题（用于快速匹配）"""
+    try:
+        from agent.tools.songs import load_songs_index
+        return [song["title"] for song in load_songs_index()]
+    except Exception:
+        return []
+
+
+# 反向包含匹配时，不超过该长度的输入直接查子串索引
+SHORT_INPUT_MAX_LEN = 8
+
+
+class TitleMatcher:
+    """多标题匹配器：一次扫描找出文本中包含的标题（优先用 Aho-Corasick，否则用正则）"""
+
+    def __init__(self, titles: tuple[str, ...]):
+        self.titles = titles
+        self.max_len = max((len(t) for t in titles), default=0)
+
+        # 标题子串 -> 第一个包含它的标题，短输入的反向匹配只需一次查表
+        self._short_input_index: dict[str, str] = {}
+        for title in titles:
+            for start in range(len(title)):
+                for end in range(start + 1, min(len(title), start + SHORT_INPUT_MAX_LEN) + 1):
+                    self._short_input_index.setdefault(title[start:end], title)
+
+        self._automaton = None
+        self._pattern = None
+        if not titles:
+            return
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton(ahocorasick.STORE_ANY, ahocorasick.KEY_STRING)
+            for title in titles:
+                self._automaton.add_word(title, title)
+            self._automaton.make_automaton()
+        else:
+            # 零宽前瞻可以取到重叠的命中；长标题优先，同一起点取最长的标题
+            ordered = sorted(titles, key=len, reverse=True)
+            self._pattern = re.compile("(?=(" + "|".join(re.escape(t) for t in ordered) + "))")
+
+    def find_in(self, text: str) -> str | None:
+        """查找文本中包含的标题（有重叠时取最长的，一样长时取最靠前的）"""
+        best = None
+        best_start = 0
+        if self._automaton is not None:
+            for end, title in self._automaton.iter(text):
+                start = end - len(title) + 1
+                if best is None or len(title) > len(best) or (len(title) == len(best) and start < best_start):
+                    best, best_start = title, start
+        elif self._pattern is not None:
+            for match in self._pattern.finditer(text):
+                title = match.group(1)
+                if best is None or len(title) > len(best):
+                    best = title
+        return best
+
+    def find_containing(self, text: str) -> str | None:
+        """查找包含该文本的标题（用户只说了标题的一部分）"""
+        if not text or len(text) > self.max_len:
+            return None
+        if len(text) <= SHORT_INPUT_MAX_LEN:
+            return self._short_input_index.get(text)
+        return next((t for t in self.titles if text in t), None)
+
+    def match(self, text: str) -> str | None:
+        """完整匹配或包含匹配"""
+        if not text:
+            return None
+        return self.find_in(text) or self.find_containing(text)
+
+
+@lru_cache(maxsize=8)
+def get_title_matcher(titles: tuple[str, ...]) -> TitleMatcher:
+    """按标题集合缓存匹配器，标题有变化时自动重建"""
+    return TitleMatcher(titles)
 
 
 def match_story_name(user_input: str) -> str | None:
@@ -246,15 +496,17 @@ def match_story_name(user_input: str) -> str | None:
     Returns:
         匹配到的故事名，或 None
     """
-    text = user_input.strip()
-    titles = get_story_titles()
+    return get_title_matcher(tuple(get_story_titles())).match(user_input.strip())
 
-    for title in titles:
-        # 完整匹配或包含匹配
-        if title in text or text in title:
-            return title
 
-    return None
+def match_song_name(user_input: str) -> str | None:
+    """
+    尝试从用户输入中匹配儿歌名
+
+    Returns:
+        匹配到的儿歌名，或 None
+    """
+    return get_title_matcher(tuple(get_song_titles())).match(user_input.strip())
 
 
 def quick_intent_check(user_input: str) -> tuple[str, str | None]:
@@ -275,49 +527,27 @@ def quick_intent_check(user_input: str) -> tuple[str, str | None]:
         - ("need_llm", None) - 需要 LLM 判断
     """
     text = user_input.strip()
-
-    # 1. 检查儿歌控制命令（优先级最高，需要快速响应）
-    for kw in PAUSE_KEYWORDS:
-        if kw in text:
-            return ("pause_song", None)
-
-    for kw in RESUME_KEYWORDS:
-        if kw in text:
-            return ("resume_song", None)
-
-    for kw in STOP_KEYWORDS:
-        if kw in text:
-            return ("stop_song", None)
-
-    for kw in NEXT_KEYWORDS:
-        if kw in text:
-            return ("next_song", None)
-
-    # 2. 检查是否是查儿歌列表
-    for kw in SONG_LIST_KEYWORDS:
-        if kw in text:
-            return ("list_songs", None)
-
-    # 3. 检查是否是查故事列表
-    for kw in LIST_KEYWORDS:
-        if kw in text:
-            return ("list_stories", None)
-
-    # 4. 检查是否包含儿歌关键词 → 走 Agent（让 LLM 提取歌曲名）
-    has_song_keyword = any(kw in text for kw in SONG_KEYWORDS)
-    if has_song_keyword:
-        # 包含儿歌关键词，走 Agent 让 LLM 处理（可以提取具体歌曲名）
+    group = match_keyword_group(text)
+
+    # 1. 儿歌控制命令（优先级最高，需要快速响应）
+    # 2. 查儿歌列表 / 3. 查故事列表
+    if group in ("pause_song", "resume_song", "stop_song", "next_song", "list_songs", "list_stories"):
+        return (group, None)
+
+    # 4. 包含儿歌关键词：能匹配到儿歌名直接播放，否则走 Agent（让 LLM 提取歌曲名）
+    if group == "song":
+        matched_song = match_song_name(text)
+        if matched_song:
+            return ("play_song", matched_song)
         return ("chat", None)
 
-    # 5. 尝试直接匹配故事名（如用户直接说"白雪公主"）
-    matched_story = match_story_name(text)
+    # 5. 尝试直接匹配故事名（如用户直接说"白雪公主"），text 已去除首尾空白
+    matched_story = get_title_matcher(tuple(get_story_titles())).match(text)
     if matched_story:
         return ("tell_story", matched_story)
 
-    # 6. 检查是否包含故事关键词
-    has_story_keyword = any(kw in text for kw in STORY_KEYWORDS)
-    if has_story_keyword:
-        # 包含故事关键词，需要 LLM 提取具体故事名
+    # 6. 包含故事关键词，需要 LLM 提取具体故事名
+    if group == "story":
         return ("need_llm", None)
 
     # 7. 明显不是故事/儿歌相关
@@ -335,12 +565,13 @@ async def detect_intent_with_cache(
     1. 儿歌控制命令（暂停、继续、停止、下一首）→ 立即返回
     2. 直接匹配故事名 → 立即返回 tell_story
     3. 查列表关键词 → 立即返回 list_stories/list_songs
-    4. 包含故事/儿歌关键词 → 调用 LLM 提取名称
-    5. 其他 → 返回 chat
+    4. 包含故事关键词且匹配到儿歌名 → 立即返回 play_song
+    5. 包含故事关键词但未匹配到名称 → 调用 LLM 提取名称
+    6. 其他 → 返回 chat
     """
     # 快速预检
     intent_type, name = quick_intent_check(user_input)
-    print(f"[Intent] 快速预检: type={intent_type}, name={name}")
+    logger.debug("[Intent] 快速预检: type=%s, name=%s", intent_type, name)
 
     if intent_type == "tell_story":
         # 直接匹配到故事名
@@ -370,5 +601,12 @@ async def detect_intent_with_cache(
     if intent_type == "chat":
         return ChatIntent(intent="chat")
 
-    # need_llm: 需要 LLM 判断和提取故事名/歌曲名
+    # need_llm: 故事名已在预检中匹配过，再查一次儿歌标题索引（如"想听小星星"）
+    # 明确说了"故事"时不按儿歌处理
+    if not any(word in user_input for word in STORY_WORDS):
+        song_name = match_song_name(user_input)
+        if song_name:
+            return PlaySongIntent(intent="play_song", song_name=song_name)
+
+    # 标题索引没有命中，才需要 LLM 判断和提取故事名/歌曲名
     return await detect_intent(user_input, model)
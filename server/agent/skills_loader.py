@@ -9,13 +9,17 @@ Agent Skills 加载器
 参考：https://agentskills.io/
 """
 
+import logging
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Optional
 from config import get_settings
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -44,12 +48,102 @@ class SkillContent:
 _skill_registry: dict[str, SkillMetadata] = {}
 _skill_content_cache: dict[str, SkillContent] = {}
 
+# 注册表版本号（每次 discover_skills 递增），用于判断技能摘要缓存是否失效
+_registry_version = 0
+_skills_summary_cache: Optional[tuple[int, str]] = None
 
+# SKILL.md 工具标题正则（模块加载时编译一次）
+_RE_TOOLS = re.compile(r"^###\s+(\w+)\s*$", re.MULTILINE)
+
+# Markdown frontmatter：开头的 --- 到下一个独占一行的 ---
+_RE_FRONTMATTER = re.compile(r"\A---[ \t]*\n(.*?)^---[ \t]*$\n?(.*)", re.DOTALL | re.MULTILINE)
+
+
+def read_text_file(path: str) -> str:
+    """读取 UTF-8 文本文件（os.read 一次读完再解码，跳过 TextIOWrapper 的多层缓冲）"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        data = os.read(fd, size)
+        while len(data) < size:
+            chunk = os.read(fd, size - len(data))
+            if not chunk:
+                break
+            data += chunk
+    finally:
+        os.close(fd)
+
+    text = data.decode("utf-8")
+    # 与文本模式 open() 一致，统一换行符
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+# YAML 中表示空值的写法
+YAML_NULLS = {"", "~", "null", "Null", "NULL"}
+
+
+def parse_simple_frontmatter(text: str) -> dict | None:
+    """按行解析简单的 key: value（如 bgm: xxx.mp3），遇到复杂结构返回 None"""
+    data = {}
+    for line in text.splitlines():
+        if not line.strip() or line.startswith("#"):
+            continue
+        # 缩进、列表等嵌套结构交给 YAML 解析
+        if line[0] in " \t-":
+            return None
+        key, sep, value = line.partition(":")
+        if not sep:
+            return None
+        value = value.strip()
+        if value[:1] in ("[", "{", "|", ">", "&", "*", "!"):
+            return None
+        if value in YAML_NULLS:
+            value = None
+        elif len(value) >= 2 and value[0] == value[-1] and value[0] in "'\"":
+            # 带转义的引号字符串交给 YAML 解析
+            if "\\" in value or value[0] in value[1:-1]:
+                return None
+            value = value[1:-1]
+        data[key.strip()] = value
+    return data
+
+
+def parse_frontmatter(content: str) -> tuple[dict, str]:
+    """解析 Markdown frontmatter
+
+    返回: (frontmatter字典, 正文内容)
+    """
+    match = _RE_FRONTMATTER.match(content)
+    if not match:
+        return {}, content
+
+    raw, body = match.groups()
+    frontmatter = parse_simple_frontmatter(raw)
+    if frontmatter is None:
+        # 复杂结构才交给 PyYAML（优先用 libyaml 的 C 实现）
+        import yaml
+        try:
+            loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+            frontmatter = yaml.load(raw, Loader=loader) or {}
+        except Exception:
+            return {}, content
+    return frontmatter, body.strip()
+
+
+@lru_cache(maxsize=1)
 def get_skills_root() -> str:
-    """获取技能根目录"""
+    """获取技能根目录（路径固定，只计算一次）"""
     return os.path.join(os.path.dirname(os.path.dirname(__file__)), "skills")
 
 
+def _first_token(value: Optional[str], default: str) -> str:
+    """取元数据值的第一个词，为空时返回默认值"""
+    parts = value.split(maxsplit=1) if value else None
+    return parts[0] if parts else default
+
+
 def parse_skill_metadata(skill_path: str) -> Optional[SkillMetadata]:
     """
     解析 SKILL.md 文件，只提取元数据部分（快速解析）
@@ -64,44 +158,52 @@ def parse_skill_metadata(skill_path: str) -> Optional[SkillMetadata]:
         return None
 
     try:
-        with open(skill_path, "r", encoding="utf-8") as f:
-            content = f.read()
-
-        # 解析标题（第一个 # 标题）
-        name_match = re.search(r"^#\s+(.+?)(?:\s*技能)?$", content, re.MULTILINE)
-        name = name_match.group(1).strip() if name_match else "未命名技能"
-
-        # 解析 ID
-        id_match = re.search(r"\*\*ID\*\*:\s*(\w+)", content)
-        skill_id = id_match.group(1) if id_match else os.path.basename(os.path.dirname(skill_path))
+        content = read_text_file(skill_path)
 
-        # 解析版本
-        version_match = re.search(r"\*\*版本\*\*:\s*([\d.]+)", content)
-        version = version_match.group(1) if version_match else "1.0.0"
-
-        # 解析图标
-        icon_match = re.search(r"\*\*图标\*\*:\s*(\S+)", content)
-        icon = icon_match.group(1) if icon_match else "🔧"
+        # 单次逐行扫描，收集标题、元数据字段和触发条件
+        name = None
+        fields: dict[str, str] = {}
+        triggers = []
+        in_trigger_section = False
+        for line in content.splitlines():
+            if line.startswith("#"):
+                if line.startswith("##"):
+                    # 遇到下一个 ## 标题即结束触发条件部分
+                    in_trigger_section = line.lstrip("#").strip() == "触发条件"
+                elif name is None and line[1:2].isspace():
+                    name = line[1:].strip()
+                continue
+
+            if in_trigger_section:
+                if line.startswith("-"):
+                    item = line[1:].strip()
+                    if item:
+                        triggers.append(item)
+                continue
+
+            # 元数据行形如 "- **ID**: xxx"
+            field = line.lstrip("- ")
+            if field.startswith("**"):
+                key, sep, value = field[2:].partition("**:")
+                if sep and key not in fields:
+                    fields[key] = value.strip()
+
+        if name and name.endswith("技能"):
+            name = name[:-2].rstrip()
+        name = name or "未命名技能"
+
+        skill_id = _first_token(fields.get("ID"), os.path.basename(os.path.dirname(skill_path)))
+        version = _first_token(fields.get("版本"), "1.0.0")
+        icon = _first_token(fields.get("图标"), "🔧")
 
-        # 解析关键词
-        keywords_match = re.search(r"\*\*关键词\*\*:\s*(.+)", content)
         keywords = []
-        if keywords_match:
-            keywords = [k.strip() for k in keywords_match.group(1).split(",")]
-
-        # 解析触发条件（提取触发条件部分的列表项）
-        triggers = []
-        trigger_section = re.search(r"##\s*触发条件\s*\n([\s\S]*?)(?=\n##|\Z)", content)
-        if trigger_section:
-            trigger_items = re.findall(r"^-\s*(.+)$", trigger_section.group(1), re.MULTILINE)
-            triggers = [t.strip() for t in trigger_items]
+        if fields.get("关键词"):
+            keywords = [k.strip() for k in fields["关键词"].split(",")]
 
         # 解析工具列表（从 ### 工具名 提取）
-        tools = re.findall(r"^###\s+(\w+)\s*$", content, re.MULTILINE)
+        tools = _RE_TOOLS.findall(content)
 
-        # 解析内容目录名称
-        content_dir_match = re.search(r"\*\*内容目录\*\*:\s*(\S+)", content)
-        content_dir = content_dir_match.group(1) if content_dir_match else "stories"
+        content_dir = _first_token(fields.get("内容目录"), "stories")
 
         return SkillMetadata(
             id=skill_id,
@@ -116,7 +218,7 @@ def parse_skill_metadata(skill_path: str) -> Optional[SkillMetadata]:
         )
 
     except Exception as e:
-        print(f"[Skills] 解析技能元数据失败 {skill_path}: {e}")
+        logger.warning("[Skills] 解析技能元数据失败 %s: %s", skill_path, e)
         return None
 
 
@@ -127,14 +229,15 @@ def discover_skills() -> dict[str, SkillMetadata]:
     Returns:
         技能ID -> 元数据的映射
     """
-    global _skill_registry
+    global _skill_registry, _registry_version
 
     skills_root = get_skills_root()
     if not os.path.exists(skills_root):
-        print(f"[Skills] 技能目录不存在: {skills_root}")
+        logger.warning("[Skills] 技能目录不存在: %s", skills_root)
         return {}
 
     skills = {}
+    candidates = []
 
     # 遍历技能目录
     for item in os.listdir(skills_root):
@@ -149,8 +252,7 @@ def discover_skills() -> dict[str, SkillMetadata]:
             if os.path.exists(index_json):
                 # 创建基础元数据
                 import json
-                with open(index_json, "r", encoding="utf-8") as f:
-                    data = json.load(f)
+                data = json.loads(read_text_file(index_json))
                 skills[item] = SkillMetadata(
                     id=data.get("id", item),
                     name=data.get("name", item),
@@ -163,12 +265,23 @@ def discover_skills() -> dict[str, SkillMetadata]:
                 )
             continue
 
-        metadata = parse_skill_metadata(skill_md)
+        candidates.append(skill_md)
+
+    # 技能较多时并行读取解析 SKILL.md，少量时直接串行避免线程池开销
+    if len(candidates) > 2:
+        with ThreadPoolExecutor(max_workers=min(8, len(candidates))) as executor:
+            parsed = list(executor.map(parse_skill_metadata, candidates))
+    else:
+        parsed = [parse_skill_metadata(skill_md) for skill_md in candidates]
+
+    for metadata in parsed:
         if metadata:
             skills[metadata.id] = metadata
-            print(f"[Skills] 发现技能: {metadata.icon} {metadata.name} (v{metadata.version})")
+            logger.info("[Skills] 发现技能: %s %s (v%s)", metadata.icon, metadata.name, metadata.version)
 
     _skill_registry = skills
+    _skill_content_cache.clear()
+    _registry_version += 1
     return skills
 
 
@@ -195,8 +308,7 @@ def load_skill_content(skill_id: str) -> Optional[SkillContent]:
     metadata = _skill_registry[skill_id]
 
     try:
-        with open(metadata.path, "r", encoding="utf-8") as f:
-            full_content = f.read()
+        full_content = read_text_file(metadata.path)
 
         content = SkillContent(
             metadata=metadata,
@@ -204,11 +316,11 @@ def load_skill_content(skill_id: str) -> Optional[SkillContent]:
         )
 
         _skill_content_cache[skill_id] = content
-        print(f"[Skills] 加载技能内容: {metadata.name}")
+        logger.debug("[Skills] 加载技能内容: %s", metadata.name)
         return content
 
     except Exception as e:
-        print(f"[Skills] 加载技能内容失败 {skill_id}: {e}")
+        logger.warning("[Skills] 加载技能内容失败 %s: %s", skill_id, e)
         return None
 
 
@@ -219,12 +331,18 @@ def get_skills_summary() -> str:
     Returns:
         技能摘要文本
     """
+    global _skills_summary_cache
+
     if not _skill_registry:
         discover_skills()
 
     if not _skill_registry:
         return "当前没有可用的技能。"
 
+    # 注册表未变化时直接返回已渲染的摘要
+    if _skills_summary_cache and _skills_summary_cache[0] == _registry_version:
+        return _skills_summary_cache[1]
+
     lines = ["## 可用技能\n"]
 
     for skill in _skill_registry.values():
@@ -240,7 +358,9 @@ def get_skills_summary() -> str:
             lines.append(f"工具: {', '.join(skill.tools)}")
         lines.append("")
 
-    return "\n".join(lines)
+    summary = "\n".join(lines)
+    _skills_summary_cache = (_registry_version, summary)
+    return summary
 
 
 def get_skill_registry() -> dict[str, SkillMetadata]:
@@ -250,6 +370,11 @@ def get_skill_registry() -> dict[str, SkillMetadata]:
     return _skill_registry
 
 
+def get_registry_version() -> int:
+    """获取注册表版本号（每次重新发现技能后递增），供调用方判断缓存是否失效"""
+    return _registry_version
+
+
 def get_skill_by_id(skill_id: str) -> Optional[SkillMetadata]:
     """根据 ID 获取技能元数据"""
     if not _skill_registry:
@@ -0,0 +1,62 @@
+"""内容目录索引刷新
+
+故事、古诗等技能都把 Markdown 文件的元数据索引在内存里。
+这里统一负责扫描目录、比较文件签名（文件名 -> 修改时间）和限制检查频率，
+各工具只需提供目录和重建索引的回调。
+"""
+
+import os
+import time
+from typing import Callable
+
+# 两次检查文件变化的最小间隔（秒）
+INDEX_CHECK_INTERVAL = 2.0
+
+
+class ContentIndex:
+    """按目录签名重建的内存索引（至多每 interval 秒检查一次文件变化）"""
+
+    def __init__(
+        self,
+        get_dir: Callable[[], str],
+        rebuild: Callable[[list[os.DirEntry]], None],
+        interval: float = INDEX_CHECK_INTERVAL,
+    ):
+        """
+        Args:
+            get_dir: 返回内容目录路径
+            rebuild: 文件有增删改时调用，参数为目录下所有 .md 文件的 scandir 条目
+            interval: 两次检查文件变化的最小间隔（秒）
+        """
+        self._get_dir = get_dir
+        self._rebuild = rebuild
+        self.interval = interval
+        self._signature: dict[str, int] | None = None
+        self._checked_at = 0.0
+
+    def scan(self) -> list[os.DirEntry]:
+        """一次 scandir 列出所有 .md 文件（条目自带类型和 stat 缓存）"""
+        try:
+            with os.scandir(self._get_dir()) as it:
+                return [entry for entry in it if entry.name.endswith(".md") and entry.is_file()]
+        except OSError:
+            return []
+
+    def refresh(self) -> None:
+        """距上次检查超过 interval 时扫描目录，签名有变化才重建索引"""
+        now = time.monotonic()
+        if now - self._checked_at < self.interval:
+            return
+        self._checked_at = now
+
+        entries = self.scan()
+        signature = {entry.name[:-3]: entry.stat().st_mtime_ns for entry in entries}
+        if signature == self._signature:
+            return
+        self._rebuild(entries)
+        self._signature = signature
+
+    def invalidate(self) -> None:
+        """标记索引过期（接口增删改文件后调用），下次 refresh 立即重新扫描并重建"""
+        self._signature = None
+        self._checked_at = 0.0
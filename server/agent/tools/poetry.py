@@ -5,7 +5,10 @@
 
 import os
 import random
+from functools import lru_cache
 from langchain_core.tools import tool
+from ..skills_loader import read_text_file, parse_frontmatter
+from .content_index import ContentIndex
 
 
 def get_poems_dir() -> str:
@@ -18,32 +21,22 @@ def get_poems_dir() -> str:
     )
 
 
-def parse_frontmatter(content: str) -> tuple[dict, str]:
-    """解析 Markdown frontmatter"""
-    if content.startswith("---"):
-        parts = content.split("---", 2)
-        if len(parts) >= 3:
-            import yaml
-            try:
-                frontmatter = yaml.safe_load(parts[1]) or {}
-                body = parts[2].strip()
-                return frontmatter, body
-            except:
-                pass
-    return {}, content
-
-
 def load_poem(poem_id: str) -> dict | None:
-    """加载单首古诗"""
-    poems_dir = get_poems_dir()
-    file_path = os.path.join(poems_dir, f"{poem_id}.md")
-
-    if not os.path.exists(file_path):
+    """加载单首古诗（按文件修改时间缓存）"""
+    file_path = os.path.join(get_poems_dir(), f"{poem_id}.md")
+    try:
+        mtime = os.stat(file_path).st_mtime_ns
+    except OSError:
         return None
+    return _load_poem_cached(poem_id, mtime)
+
 
-    with open(file_path, "r", encoding="utf-8") as f:
-        content = f.read()
+@lru_cache(maxsize=256)
+def _load_poem_cached(poem_id: str, mtime: int) -> dict:
+    """读取并解析古诗文件（mtime 作为缓存键的一部分，文件修改后自动失效）"""
+    file_path = os.path.join(get_poems_dir(), f"{poem_id}.md")
 
+    content = read_text_file(file_path)
     frontmatter, body = parse_frontmatter(content)
 
     # 解析标题
@@ -61,17 +54,60 @@ def load_poem(poem_id: str) -> dict | None:
     }
 
 
+# 古诗索引：id -> 古诗，小写标题 -> id（启动时构建，文件有变化时重建）
+_POEM_INDEX: dict[str, dict] = {}
+_TITLE_TO_ID: dict[str, str] = {}
+
+
+def _build_poem_index(entries: list[os.DirEntry]) -> None:
+    """古诗文件有增删改时重建索引"""
+    global _POEM_INDEX, _TITLE_TO_ID
+
+    index = {}
+    for entry in entries:
+        poem_id = entry.name[:-3]
+        index[poem_id] = _load_poem_cached(poem_id, entry.stat().st_mtime_ns)
+
+    title_to_id = {}
+    for poem_id, poem in index.items():
+        title_to_id.setdefault(poem["title"].lower(), poem_id)
+
+    _POEM_INDEX, _TITLE_TO_ID = index, title_to_id
+
+
+_poem_index = ContentIndex(get_poems_dir, _build_poem_index)
+
+
+def get_poem_index() -> dict[str, dict]:
+    """获取古诗索引（至多每 INDEX_CHECK_INTERVAL 秒检查一次文件变化）"""
+    _poem_index.refresh()
+    return _POEM_INDEX
+
+
+def invalidate_poem_index() -> None:
+    """古诗文件被接口增删改后调用，下次访问索引时立即重建"""
+    _poem_index.invalidate()
+
+
+def find_poem(poem_name: str) -> dict | None:
+    """按 ID、标题、标题片段查找古诗"""
+    index = get_poem_index()
+    if poem_name in index:
+        return index[poem_name]
+
+    name_lower = poem_name.lower()
+    poem_id = _TITLE_TO_ID.get(name_lower)
+    if poem_id is None:
+        poem_id = next((pid for title, pid in _TITLE_TO_ID.items() if name_lower in title), None)
+    return index.get(poem_id) if poem_id else None
+
+
 def get_all_poem_ids() -> list[str]:
     """获取所有古诗 ID"""
-    poems_dir = get_poems_dir()
-    if not os.path.exists(poems_dir):
-        return []
+    return list(get_poem_index())
+
 
-    return [
-        filename[:-3]
-        for filename in os.listdir(poems_dir)
-        if filename.endswith(".md")
-    ]
+get_poem_index()
 
 
 @tool
@@ -99,17 +135,9 @@ def recite_poem(poem_name: str = "") -> str:
 
     # 如果指定了诗名，尝试匹配
     if poem_name:
-        # 直接匹配 ID
-        if poem_name in poem_ids:
-            poem = load_poem(poem_name)
-            if poem:
-                return f"好的，我来为你朗诵《{poem['title']}》：\n\n{poem['content']}"
-
-        # 模糊匹配标题
-        for poem_id in poem_ids:
-            poem = load_poem(poem_id)
-            if poem and poem_name.lower() in poem["title"].lower():
-                return f"好的，我来为你朗诵《{poem['title']}》：\n\n{poem['content']}"
+        poem = find_poem(poem_name)
+        if poem:
+            return f"好的，我来为你朗诵《{poem['title']}》：\n\n{poem['content']}"
 
         # 没找到匹配的古诗
         available = ", ".join(poem_ids[:5])
@@ -117,7 +145,7 @@ def recite_poem(poem_name: str = "") -> str:
 
     # 随机选择一首
     poem_id = random.choice(poem_ids)
-    poem = load_poem(poem_id)
+    poem = get_poem_index().get(poem_id)
 
     if poem:
         return f"好的，我来为你朗诵《{poem['title']}》：\n\n{poem['content']}"
@@ -137,15 +165,11 @@ def list_poems() -> str:
     Returns:
         所有可用古诗的列表。
     """
-    poem_ids = get_all_poem_ids()
+    index = get_poem_index()
 
-    if not poem_ids:
+    if not index:
         return "目前还没有古诗，请先添加一些古诗到诗词库中。"
 
-    poems = []
-    for poem_id in poem_ids:
-        poem = load_poem(poem_id)
-        if poem:
-            poems.append(f"- {poem['title']}")
+    poems = [f"- {poem['title']}" for poem in index.values()]
 
     return f"我会背诵以下古诗：\n\n" + "\n".join(poems) + "\n\n想听哪一首呢？"
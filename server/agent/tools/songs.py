@@ -6,6 +6,8 @@
 import os
 import json
 import random
+import orjson
+from functools import lru_cache
 from langchain_core.tools import tool
 
 
@@ -18,40 +20,73 @@ def get_songs_dir() -> str:
     )
 
 
+def _get_songs_cache() -> tuple[list[dict], dict[str, dict], dict[str, dict], list[tuple[str, dict]]]:
+    """获取 (歌曲列表, 小写标题 -> 歌曲, ID -> 歌曲, (小写关键词, 歌曲) 列表)
+
+    按 index.json 修改时间缓存，上传/删除后自动刷新
+    """
+    index_file = os.path.join(get_songs_dir(), "index.json")
+    try:
+        mtime = os.stat(index_file).st_mtime_ns
+    except OSError:
+        return [], {}, {}, []
+    return _load_songs_index_cached(mtime)
+
+
+@lru_cache(maxsize=1)
+def _load_songs_index_cached(mtime: int) -> tuple[list[dict], dict[str, dict], dict[str, dict], list[tuple[str, dict]]]:
+    """读取并解析 index.json，同时构建标题、ID 和关键词索引（小写只在这里算一次）"""
+    index_file = os.path.join(get_songs_dir(), "index.json")
+    with open(index_file, "rb") as f:
+        songs = orjson.loads(f.read()).get("songs", [])
+
+    by_title = {}
+    for song in songs:
+        by_title.setdefault(song["title"].lower(), song)
+        if song.get("title_en"):
+            by_title.setdefault(song["title_en"].lower(), song)
+    by_id = {song["id"]: song for song in songs}
+    keywords = [(kw.lower(), song) for song in songs for kw in song.get("keywords", [])]
+    return songs, by_title, by_id, keywords
+
+
 def load_songs_index() -> list[dict]:
     """加载歌曲索引"""
-    index_file = os.path.join(get_songs_dir(), "index.json")
-    if not os.path.exists(index_file):
-        return []
+    return _get_songs_cache()[0]
+
+
+def get_song_by_id(song_id: str) -> dict | None:
+    """根据 ID 查找歌曲（查内存索引）"""
+    return _get_songs_cache()[2].get(song_id)
 
-    with open(index_file, "r", encoding="utf-8") as f:
-        data = json.load(f)
-        return data.get("songs", [])
+
+def reload_songs() -> list[dict]:
+    """丢弃缓存并重新加载歌曲索引（管理接口修改 index.json 后调用）"""
+    _load_songs_index_cached.cache_clear()
+    return load_songs_index()
 
 
 def find_song_by_name(name: str) -> dict | None:
     """根据名称查找歌曲"""
-    songs = load_songs_index()
+    _, by_title, _, keywords = _get_songs_cache()
     name_lower = name.lower()
 
-    for song in songs:
-        # 精确匹配标题
-        if name_lower == song["title"].lower() or name_lower == song.get("title_en", "").lower():
+    # 精确匹配标题
+    if name_lower in by_title:
+        return by_title[name_lower]
+
+    # 关键词匹配（关键词已预先转成小写）
+    for kw, song in keywords:
+        if name_lower in kw or kw in name_lower:
             return song
-        # 关键词匹配
-        for kw in song.get("keywords", []):
-            if name_lower in kw.lower() or kw.lower() in name_lower:
-                return song
 
     return None
 
 
 def get_random_song() -> dict | None:
-    """随机获取一首歌曲"""
+    """随机获取一首歌曲（从已缓存的索引中选取）"""
     songs = load_songs_index()
-    if not songs:
-        return None
-    return random.choice(songs)
+    return random.choice(songs) if songs else None
 
 
 @tool
@@ -190,3 +225,7 @@ def list_songs() -> str:
 
     titles = [song["title"] for song in songs]
     return f"目前有以下儿歌可以听：{'、'.join(titles)}。想听哪首？"
+
+
+# 启动时预加载歌曲索引
+load_songs_index()
@@ -5,11 +5,15 @@
 
 import os
 import random
+from functools import lru_cache
 from langchain_core.tools import tool
+from ..skills_loader import parse_frontmatter
+from .content_index import ContentIndex
 
 
+@lru_cache(maxsize=1)
 def get_stories_dir() -> str:
-    """获取故事目录路径（从技能目录读取）"""
+    """获取故事目录路径（从技能目录读取，路径固定，只计算一次）"""
     # 技能目录在 server/skills/storytelling/stories
     return os.path.join(
         os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
@@ -19,31 +23,84 @@ def get_stories_dir() -> str:
     )
 
 
-def parse_frontmatter(content: str) -> tuple[dict, str]:
-    """解析 Markdown frontmatter
+def get_story_mtime(story_id: str) -> int | None:
+    """获取故事文件的修改时间，文件不存在时返回 None"""
+    file_path = os.path.join(get_stories_dir(), f"{story_id}.md")
+    try:
+        return os.stat(file_path).st_mtime_ns
+    except OSError:
+        return None
 
-    返回: (frontmatter字典, 正文内容)
-    """
-    if content.startswith("---"):
-        parts = content.split("---", 2)
-        if len(parts) >= 3:
-            import yaml
-            try:
-                frontmatter = yaml.safe_load(parts[1]) or {}
-                body = parts[2].strip()
-                return frontmatter, body
-            except:
-                pass
-    return {}, content
-
-
-def load_story(story_id: str) -> dict | None:
-    """加载单个故事"""
-    stories_dir = get_stories_dir()
-    file_path = os.path.join(stories_dir, f"{story_id}.md")
-
-    if not os.path.exists(file_path):
+
+def load_story(story_id: str, entry: os.DirEntry | None = None) -> dict | None:
+    """加载单个故事（按文件修改时间缓存，传入 scandir 条目时复用其 stat 结果）"""
+    mtime = entry.stat().st_mtime_ns if entry else get_story_mtime(story_id)
+    if mtime is None:
         return None
+    file_path = entry.path if entry else os.path.join(get_stories_dir(), f"{story_id}.md")
+    return _load_story_cached(file_path, mtime)
+
+
+def load_story_meta(story_id: str, entry: os.DirEntry | None = None) -> dict | None:
+    """只加载故事的 ID、标题和 BGM（列表展示用，不读取正文；传入其他目录的 scandir 条目时读取该文件）"""
+    mtime = entry.stat().st_mtime_ns if entry else get_story_mtime(story_id)
+    if mtime is None:
+        return None
+    file_path = entry.path if entry else os.path.join(get_stories_dir(), f"{story_id}.md")
+    return _load_story_meta_cached(file_path, mtime)
+
+
+# 读取故事标题时只读文件开头的字节数（标题和 frontmatter 都在开头）
+STORY_HEAD_BYTES = 2048
+
+
+def _read_head(path: str, n: int = STORY_HEAD_BYTES) -> tuple[str, bool]:
+    """读取文件开头 n 字节，返回 (文本, 是否读完整个文件)"""
+    with open(path, "rb") as f:
+        data = f.read(n + 1)
+    complete = len(data) <= n
+    # 与 read_text_file 一致：统一换行符，否则 CRLF 文件的 frontmatter 无法识别
+    return data[:n].decode("utf-8", errors="ignore").replace("\r\n", "\n"), complete
+
+
+@lru_cache(maxsize=256)
+def _load_story_meta_cached(file_path: str, mtime: int) -> dict:
+    """只读文件开头解析标题和 BGM（mtime 作为缓存键的一部分，文件修改后自动失效）"""
+    story_id = os.path.basename(file_path)[:-3]
+
+    head, complete = _read_head(file_path)
+    lines = head.splitlines(keepends=True)
+    if not complete and lines:
+        # 最后一行可能被截断，不参与解析
+        lines.pop()
+
+    title = None
+    header = []
+    in_frontmatter = False
+    for idx, line in enumerate(lines):
+        if line.startswith("---") and (idx == 0 or in_frontmatter):
+            in_frontmatter = not in_frontmatter
+            header.append(line)
+            continue
+        if in_frontmatter:
+            header.append(line)
+        elif line.startswith("# "):
+            title = line[2:].strip()
+            break
+
+    if title is None and not complete:
+        # 开头没有找到标题（frontmatter 过长等），退回到完整读取
+        story = _load_story_cached(file_path, mtime)
+        return {"id": story_id, "title": story["title"], "bgm": story["bgm"]}
+
+    frontmatter, _ = parse_frontmatter("".join(header))
+    return {"id": story_id, "title": title or story_id, "bgm": frontmatter.get("bgm")}
+
+
+@lru_cache(maxsize=256)
+def _load_story_cached(file_path: str, mtime: int) -> dict:
+    """读取并解析故事文件（mtime 作为缓存键的一部分，文件修改后自动失效）"""
+    story_id = os.path.basename(file_path)[:-3]
 
     with open(file_path, "r", encoding="utf-8") as f:
         content = f.read()
@@ -66,17 +123,73 @@ def load_story(story_id: str) -> dict | None:
     }
 
 
+# 故事索引：id -> 元数据（标题、BGM、路径、修改时间），正文只在讲故事时读取
+_STORY_INDEX: dict[str, dict] = {}
+# 故事 ID 列表（随机选择用，随索引一起重建）
+_STORY_IDS: list[str] = []
+# 规范化（casefold）标题 -> id（精确匹配），id -> 规范化标题（片段匹配）
+_TITLE_CF_TO_ID: dict[str, str] = {}
+_ID_TO_TITLE_CF: dict[str, str] = {}
+
+
+def _build_story_index(entries: list[os.DirEntry]) -> None:
+    """故事文件有增删改时重建索引"""
+    global _STORY_INDEX, _STORY_IDS, _TITLE_CF_TO_ID, _ID_TO_TITLE_CF
+
+    index = {}
+    for entry in entries:
+        story_id = entry.name[:-3]
+        meta = load_story_meta(story_id, entry)
+        if meta:
+            index[story_id] = {**meta, "path": entry.path, "mtime": entry.stat().st_mtime_ns}
+
+    id_to_title = {story_id: story["title"].casefold() for story_id, story in index.items()}
+    title_to_id = {}
+    for story_id, title in id_to_title.items():
+        title_to_id.setdefault(title, story_id)
+
+    _STORY_INDEX, _TITLE_CF_TO_ID, _ID_TO_TITLE_CF = index, title_to_id, id_to_title
+    _STORY_IDS = list(index)
+
+
+_story_index = ContentIndex(get_stories_dir, _build_story_index)
+
+
+def get_story_index() -> dict[str, dict]:
+    """获取故事索引（至多每 INDEX_CHECK_INTERVAL 秒检查一次文件变化）"""
+    _story_index.refresh()
+    return _STORY_INDEX
+
+
+def invalidate_story_index() -> None:
+    """故事文件被接口增删改后调用，下次访问索引时立即重建"""
+    _story_index.invalidate()
+
+
+def find_story_id(story_name: str) -> str | None:
+    """按 ID、完整标题、标题片段查找故事 ID（只查内存索引，不读文件）"""
+    if story_name in get_story_index():
+        return story_name
+
+    query = story_name.casefold()
+    story_id = _TITLE_CF_TO_ID.get(query)
+    if story_id is None:
+        story_id = next((sid for sid, title in _ID_TO_TITLE_CF.items() if query in title), None)
+    return story_id
+
+
 def get_all_story_ids() -> list[str]:
     """获取所有故事 ID"""
-    stories_dir = get_stories_dir()
-    if not os.path.exists(stories_dir):
-        return []
+    return list(get_story_index())
+
 
-    return [
-        filename[:-3]
-        for filename in os.listdir(stories_dir)
-        if filename.endswith(".md")
-    ]
+def pick_random_story_id() -> str | None:
+    """从内存索引中随机选一个故事 ID"""
+    get_story_index()
+    return random.choice(_STORY_IDS) if _STORY_IDS else None
+
+
+get_story_index()
 
 
 @tool
@@ -97,32 +210,26 @@ def tell_story(story_name: str = "") -> str:
     Returns:
         故事的完整内容，直接输出给用户即可。
     """
-    story_ids = get_all_story_ids()
+    index = get_story_index()
 
-    if not story_ids:
+    if not index:
         return "抱歉，目前没有可用的故事。请先添加一些故事到故事库中。"
 
     # 如果指定了故事名称，尝试匹配
     if story_name:
-        # 直接匹配 ID
-        if story_name in story_ids:
-            story = load_story(story_name)
-            if story:
-                return f"好的，我来给你讲《{story['title']}》这个故事：\n\n{story['content']}"
-
-        # 模糊匹配标题
-        for story_id in story_ids:
-            story = load_story(story_id)
-            if story and story_name.lower() in story["title"].lower():
-                return f"好的，我来给你讲《{story['title']}》这个故事：\n\n{story['content']}"
+        # 按 ID、标题、标题片段匹配，只读取命中的那个故事
+        story_id = find_story_id(story_name)
+        story = load_story(story_id) if story_id else None
+        if story:
+            return f"好的，我来给你讲《{story['title']}》这个故事：\n\n{story['content']}"
 
         # 没找到匹配的故事
-        available = ", ".join(story_ids[:5])
+        available = ", ".join(_STORY_IDS[:5])
         return f"抱歉，没有找到名为「{story_name}」的故事。可用的故事有：{available}..."
 
     # 随机选择一个故事
-    story_id = random.choice(story_ids)
-    story = load_story(story_id)
+    story_id = pick_random_story_id()
+    story = load_story(story_id) if story_id else None
 
     if story:
         return f"好的，我来给你讲《{story['title']}》这个故事：\n\n{story['content']}"
@@ -141,16 +248,12 @@ def list_stories() -> str:
     Returns:
         故事列表，直接告诉用户即可。
     """
-    story_ids = get_all_story_ids()
+    index = get_story_index()
 
-    if not story_ids:
+    if not index:
         return "目前没有可用的故事。"
 
-    stories_info = []
-    for idx, story_id in enumerate(story_ids, 1):
-        story = load_story(story_id)
-        if story:
-            stories_info.append(story['title'])
+    stories_info = [story["title"] for story in index.values()]
 
     # 用顿号分隔，更适合语音朗读
     return f"目前有以下故事可以听：{' 、'.join(stories_info)}。"
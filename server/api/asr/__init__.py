@@ -6,13 +6,147 @@
 3. FunASR - 本地 FunASR，需配置 FUNASR_ENABLED=true
 """
 
-from fastapi import APIRouter, UploadFile, File
+import io
+import hashlib
+import logging
+import time
+import asyncio
+from fastapi import APIRouter, UploadFile, File, HTTPException, Request
+from collections import OrderedDict
+from typing import Awaitable, Callable
+from fastapi.routing import APIRoute
 from config import get_settings
 
 from . import sensevoice, whisper, funasr
 
-router = APIRouter()
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+def check_upload_size(size: int | None) -> None:
+    """上传音频超过 ASR_MAX_BYTES 时返回 413"""
+    if size is not None and size > settings.ASR_MAX_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"音频过大，最大支持 {settings.ASR_MAX_BYTES // (1024 * 1024)}MB",
+        )
+
+
+class UploadLimitRoute(APIRoute):
+    """解析请求体之前按 Content-Length 拒绝超大上传"""
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def limited_handler(request: Request):
+            content_length = request.headers.get("content-length")
+            if content_length and content_length.isdigit():
+                check_upload_size(int(content_length))
+            return await handler(request)
+
+        return limited_handler
+
+
+router = APIRouter(route_class=UploadLimitRoute)
+
+# 健康检查结果缓存（前端会轮询，短时间内直接返回上次结果）
+HEALTH_CACHE_TTL = 5.0
+_health_cache: tuple[float, dict] | None = None
+
+# 相同音频的并发请求合并：(服务, 内容哈希) -> 进行中的 Future
+_inflight: dict[tuple[str, bytes], asyncio.Future] = {}
+# 最近的转写结果（浏览器重试等完全相同的请求直接复用）
+RECENT_RESULT_TTL = 10.0
+MAX_RECENT_RESULTS = 64
+_recent_results: OrderedDict[tuple[str, bytes], tuple[float, dict]] = OrderedDict()
+
+
+async def warmup() -> None:
+    """启动时并行预加载已启用的本地 ASR 模型（各自的线程池中执行，不阻塞事件循环）"""
+    services = [(name, service) for name, service in (("Whisper", whisper), ("FunASR", funasr)) if service.is_available()]
+    results = await asyncio.gather(*(service.preload() for _, service in services), return_exceptions=True)
+    for (name, _), result in zip(services, results):
+        if isinstance(result, Exception):
+            # 预热失败不影响启动，首次请求时会再尝试加载
+            logger.warning("[ASR] %s 预加载失败: %s", name, result)
+
+
+async def transcribe_hedged(audio_bytes: bytes, filename: str, content_type: str | None) -> dict:
+    """
+    对冲请求：先请求 SenseVoice，超过 ASR_HEDGE_MS 未返回（或失败）时
+    同时请求已启用的本地 ASR，谁先成功用谁，另一个取消
+    """
+    fallback = next((service for service in (whisper, funasr) if service.is_available()), None)
+    primary = asyncio.create_task(sensevoice.transcribe(io.BytesIO(audio_bytes), filename, content_type))
+    if fallback is None:
+        return await primary
+
+    await asyncio.wait({primary}, timeout=settings.ASR_HEDGE_MS / 1000)
+    if primary.done() and primary.exception() is None:
+        return primary.result()
+
+    logger.debug("[ASR] SenseVoice %sms 内未返回，同时请求本地 ASR", settings.ASR_HEDGE_MS)
+    backup = asyncio.create_task(fallback.transcribe(io.BytesIO(audio_bytes), filename))
+    pending = {backup} if primary.done() else {primary, backup}
+    error = primary.exception() if primary.done() else None
+
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def hash_upload(audio: UploadFile) -> bytes:
+    """分块计算上传音频的内容哈希，完成后把读取位置重置到开头"""
+    digest = hashlib.blake2b(digest_size=16)
+    while chunk := await audio.read(1024 * 1024):
+        digest.update(chunk)
+    await audio.seek(0)
+    return digest.digest()
+
+
+async def transcribe_once(
+    service: str,
+    audio: UploadFile,
+    run: Callable[[], Awaitable[dict]],
+) -> dict:
+    """相同音频同时只转写一次，其余请求等待同一结果；短时间内的重复请求直接返回缓存"""
+    key = (service, await hash_upload(audio))
+
+    cached = _recent_results.get(key)
+    if cached and time.monotonic() - cached[0] < RECENT_RESULT_TTL:
+        return cached[1]
+
+    future = _inflight.get(key)
+    if future is not None:
+        return await asyncio.shield(future)
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        result = await run()
+    except BaseException as e:
+        if isinstance(e, Exception):
+            future.set_exception(e)
+            future.exception()  # 没有其他等待者时避免 "never retrieved" 警告
+        else:
+            future.cancel()
+        raise
+    finally:
+        _inflight.pop(key, None)
+
+    future.set_result(result)
+    _recent_results[key] = (time.monotonic(), result)
+    if len(_recent_results) > MAX_RECENT_RESULTS:
+        _recent_results.popitem(last=False)
+    return result
 
 
 # ============ API 端点 ============
@@ -20,38 +154,64 @@ settings = get_settings()
 @router.post("/sensevoice/transcribe")
 async def sensevoice_transcribe(audio: UploadFile = File(...)):
     """SenseVoice ASR (SiliconFlow 云端)"""
-    audio_bytes = await audio.read()
-    print(f"[ASR] SenseVoice 收到音频: {len(audio_bytes)} bytes")
-    return await sensevoice.transcribe(audio_bytes, audio.filename or "audio.webm")
+    check_upload_size(audio.size)
+    logger.debug("[ASR] SenseVoice 收到音频: %s bytes", audio.size)
+    return await transcribe_once(
+        "sensevoice",
+        audio,
+        lambda: sensevoice.transcribe(audio.file, audio.filename or "audio.webm", audio.content_type),
+    )
 
 
 @router.post("/whisper/transcribe")
 async def whisper_transcribe(audio: UploadFile = File(...)):
     """Whisper ASR (本地 faster-whisper)"""
-    audio_bytes = await audio.read()
-    print(f"[ASR] Whisper 收到音频: {len(audio_bytes)} bytes")
-    return await whisper.transcribe(audio_bytes, audio.filename or "audio.webm")
+    check_upload_size(audio.size)
+    logger.debug("[ASR] Whisper 收到音频: %s bytes", audio.size)
+    return await transcribe_once(
+        "whisper",
+        audio,
+        lambda: whisper.transcribe(audio.file, audio.filename or "audio.webm"),
+    )
 
 
 @router.post("/funasr/transcribe")
 async def funasr_transcribe(audio: UploadFile = File(...)):
     """FunASR (本地服务)"""
-    audio_bytes = await audio.read()
-    print(f"[ASR] FunASR 收到音频: {len(audio_bytes)} bytes")
-    return await funasr.transcribe(audio_bytes, audio.filename or "audio.webm")
+    check_upload_size(audio.size)
+    logger.debug("[ASR] FunASR 收到音频: %s bytes", audio.size)
+    return await transcribe_once(
+        "funasr",
+        audio,
+        lambda: funasr.transcribe(audio.file, audio.filename or "audio.webm"),
+    )
 
 
 @router.post("/transcribe")
 async def transcribe(audio: UploadFile = File(...)):
     """默认 ASR 端点 (使用 SenseVoice)"""
-    audio_bytes = await audio.read()
-    print(f"[ASR] 收到音频: {len(audio_bytes)} bytes")
-    return await sensevoice.transcribe(audio_bytes, audio.filename or "audio.webm")
+    check_upload_size(audio.size)
+    logger.debug("[ASR] 收到音频: %s bytes", audio.size)
+
+    async def run() -> dict:
+        if settings.ASR_HEDGE_MS > 0:
+            # 对冲需要两路同时读取音频，先读入内存
+            audio_bytes = await audio.read()
+            return await transcribe_hedged(audio_bytes, audio.filename or "audio.webm", audio.content_type)
+        return await sensevoice.transcribe(audio.file, audio.filename or "audio.webm", audio.content_type)
+
+    return await transcribe_once("default", audio, run)
 
 
 @router.get("/health")
 async def health():
     """检查 ASR 服务健康状态"""
+    global _health_cache
+
+    now = time.monotonic()
+    if _health_cache and now - _health_cache[0] < HEALTH_CACHE_TTL:
+        return _health_cache[1]
+
     services = []
 
     # 检查 SenseVoice（云端）
@@ -72,4 +232,6 @@ async def health():
     else:
         services.append({"name": "funasr", "status": "disabled", "type": "local"})
 
-    return {"services": services}
+    result = {"services": services}
+    _health_cache = (now, result)
+    return result
@@ -1,56 +1,88 @@
 """FunASR - 本地服务"""
 
+import logging
 import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import tempfile
+import shutil
 import os
+from typing import BinaryIO
 from fastapi import HTTPException
 from config import get_settings
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# 临时音频优先写到内存文件系统，避免磁盘读写
+TEMP_AUDIO_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
 
 # 懒加载的模型实例
 _model = None
+_model_lock = threading.Lock()
+
+# 专用推理线程池，避免和其他模型或默认线程池互相排队
+_executor = ThreadPoolExecutor(max_workers=max(1, settings.FUNASR_WORKERS), thread_name_prefix="funasr")
 
 
 def get_model():
     """懒加载 FunASR 模型"""
     global _model
     if _model is None:
-        if not settings.FUNASR_ENABLED:
-            raise HTTPException(status_code=503, detail="FunASR 未启用，请配置 FUNASR_ENABLED=true")
-        try:
-            from funasr import AutoModel
-            print(f"[ASR] 加载 FunASR 模型")
-            _model = AutoModel(model="paraformer-zh", model_revision="v2.0.4")
-            print(f"[ASR] FunASR 模型加载完成")
-        except ImportError:
-            raise HTTPException(status_code=503, detail="未安装 funasr，请运行: pip install funasr")
+        # 多个推理线程可能同时触发加载，加锁保证只加载一次
+        with _model_lock:
+            if _model is None:
+                if not settings.FUNASR_ENABLED:
+                    raise HTTPException(status_code=503, detail="FunASR 未启用，请配置 FUNASR_ENABLED=true")
+                try:
+                    from funasr import AutoModel
+                    logger.info("[ASR] 加载 FunASR 模型")
+                    _model = AutoModel(model="paraformer-zh", model_revision="v2.0.4")
+                    logger.info("[ASR] FunASR 模型加载完成")
+                except ImportError:
+                    raise HTTPException(status_code=503, detail="未安装 funasr，请运行: pip install funasr")
     return _model
 
 
-def transcribe_sync(audio_bytes: bytes) -> dict:
+def transcribe_sync(audio_file: BinaryIO) -> dict:
     """同步转写"""
     model = get_model()
 
-    # 写入临时文件
-    with tempfile.NamedTemporaryFile(suffix=".webm", delete=False) as f:
-        f.write(audio_bytes)
+    # 写入临时文件（FunASR 需要文件路径）
+    with tempfile.NamedTemporaryFile(suffix=".webm", dir=TEMP_AUDIO_DIR, delete=False) as f:
+        shutil.copyfileobj(audio_file, f)
         temp_path = f.name
 
     try:
         result = model.generate(input=temp_path)
         text = result[0]["text"] if result else ""
-        print(f"[ASR] FunASR 结果: {text}")
+        logger.debug("[ASR] FunASR 结果: %s", text)
         return {"success": True, "text": text, "service": "funasr"}
     finally:
         os.unlink(temp_path)
 
 
-async def transcribe(audio_bytes: bytes, filename: str = "audio.webm") -> dict:
+def warmup() -> None:
+    """预加载模型并跑一次空白音频推理，让首个请求不必等待加载"""
+    import numpy as np
+
+    model = get_model()
+    try:
+        model.generate(input=np.zeros(16000, dtype=np.float32))
+    except Exception as e:
+        logger.warning("[ASR] FunASR 预热推理失败: %s", e)
+
+
+async def preload() -> None:
+    """在专用线程池中预热模型"""
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(_executor, warmup)
+
+
+async def transcribe(audio_file: BinaryIO, filename: str = "audio.webm") -> dict:
     """使用本地 FunASR 进行转写"""
-    print(f"[ASR] FunASR 转写, 音频: {len(audio_bytes)} bytes")
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, transcribe_sync, audio_bytes)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, transcribe_sync, audio_file)
 
 
 def is_available() -> bool:
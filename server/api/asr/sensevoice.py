@@ -1,47 +1,80 @@
 """SenseVoice ASR - SiliconFlow 云端"""
 
+import logging
 import aiohttp
+import orjson
+from functools import lru_cache
+from typing import BinaryIO
 from fastapi import HTTPException
 from config import get_settings
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=1)
+def get_api_key() -> str:
+    """获取 SiliconFlow API Key（配置为单例，结果只计算一次）"""
+    return settings.TTS_API_KEY or settings.OPENAI_API_KEY
 
-async def transcribe(audio_bytes: bytes, filename: str = "audio.webm") -> dict:
-    """使用 SiliconFlow SenseVoice 进行转写"""
-    api_key = settings.TTS_API_KEY or settings.OPENAI_API_KEY
+
+# 进程内复用的 HTTP 会话，避免每次转写都重新建立 TCP/TLS 连接
+_session: aiohttp.ClientSession | None = None
+
+
+def get_session() -> aiohttp.ClientSession:
+    """获取共享的 ClientSession（懒创建，关闭后自动重建）"""
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=32, ttl_dns_cache=300, keepalive_timeout=60),
+        )
+    return _session
+
+
+async def close_session() -> None:
+    """关闭共享的 ClientSession（应用关闭时调用）"""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+async def transcribe(
+    audio_file: BinaryIO,
+    filename: str = "audio.webm",
+    content_type: str | None = None,
+) -> dict:
+    """使用 SiliconFlow SenseVoice 进行转写（上传文件对象直接流式转发，不整体读入内存）"""
+    api_key = get_api_key()
     if not api_key:
         raise HTTPException(status_code=503, detail="未配置 SiliconFlow API Key")
 
-    async with aiohttp.ClientSession() as session:
-        data = aiohttp.FormData()
-        data.add_field('file', audio_bytes, filename=filename, content_type='audio/webm')
-        data.add_field('model', settings.ASR_MODEL)
-
-        headers = {'Authorization': f'Bearer {api_key}'}
+    session = get_session()
+    data = aiohttp.FormData()
+    data.add_field('file', audio_file, filename=filename, content_type=content_type or 'audio/webm')
+    data.add_field('model', settings.ASR_MODEL)
 
-        print(f"[ASR] SenseVoice 转写, 音频: {len(audio_bytes)} bytes")
+    headers = {'Authorization': f'Bearer {api_key}'}
 
-        async with session.post(
-            settings.ASR_BASE_URL,
-            data=data,
-            headers=headers,
-            timeout=aiohttp.ClientTimeout(total=30)
-        ) as response:
-            if response.status != 200:
-                error_text = await response.text()
-                print(f"[ASR] SenseVoice 错误: {error_text}")
-                raise HTTPException(status_code=response.status, detail=f"SenseVoice 错误: {error_text}")
+    async with session.post(
+        settings.ASR_BASE_URL,
+        data=data,
+        headers=headers,
+        timeout=aiohttp.ClientTimeout(total=30)
+    ) as response:
+        if response.status != 200:
+            error_text = await response.text()
+            logger.warning("[ASR] SenseVoice 错误: %s", error_text)
+            raise HTTPException(status_code=response.status, detail=f"SenseVoice 错误: {error_text}")
 
-            result = await response.json()
-            text = result.get("text", "").strip()
-            print(f"[ASR] SenseVoice 结果: {text}")
+        result = orjson.loads(await response.read())
+        text = result.get("text", "").strip()
+        logger.debug("[ASR] SenseVoice 结果: %s", text)
 
-            return {"success": True, "text": text, "service": "sensevoice"}
+        return {"success": True, "text": text, "service": "sensevoice"}
 
 
 def is_available() -> bool:
     """检查服务是否可用"""
-    api_key = settings.TTS_API_KEY or settings.OPENAI_API_KEY
-    return bool(api_key)
+    return bool(get_api_key())
@@ -1,57 +1,78 @@
 """Whisper ASR - 本地 faster-whisper"""
 
+import logging
 import asyncio
-import tempfile
-import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO
 from fastapi import HTTPException
 from config import get_settings
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 # 懒加载的模型实例
 _model = None
+_model_lock = threading.Lock()
+
+# 专用推理线程池，避免和其他模型或默认线程池互相排队
+_executor = ThreadPoolExecutor(max_workers=max(1, settings.WHISPER_WORKERS), thread_name_prefix="whisper")
 
 
 def get_model():
     """懒加载 Whisper 模型"""
     global _model
     if _model is None:
-        if not settings.WHISPER_ENABLED:
-            raise HTTPException(status_code=503, detail="Whisper 未启用，请配置 WHISPER_ENABLED=true")
-        try:
-            from faster_whisper import WhisperModel
-            print(f"[ASR] 加载 Whisper 模型: {settings.WHISPER_MODEL}")
-            _model = WhisperModel(settings.WHISPER_MODEL, device="cpu", compute_type="int8")
-            print(f"[ASR] Whisper 模型加载完成")
-        except ImportError:
-            raise HTTPException(status_code=503, detail="未安装 faster-whisper，请运行: pip install faster-whisper")
+        # 多个推理线程可能同时触发加载，加锁保证只加载一次
+        with _model_lock:
+            if _model is None:
+                if not settings.WHISPER_ENABLED:
+                    raise HTTPException(status_code=503, detail="Whisper 未启用，请配置 WHISPER_ENABLED=true")
+                try:
+                    from faster_whisper import WhisperModel
+                    logger.info("[ASR] 加载 Whisper 模型: %s", settings.WHISPER_MODEL)
+                    _model = WhisperModel(settings.WHISPER_MODEL, device="cpu", compute_type="int8")
+                    logger.info("[ASR] Whisper 模型加载完成")
+                except ImportError:
+                    raise HTTPException(status_code=503, detail="未安装 faster-whisper，请运行: pip install faster-whisper")
     return _model
 
 
-def transcribe_sync(audio_bytes: bytes) -> dict:
+def transcribe_sync(audio_file: BinaryIO) -> dict:
     """同步转写（Whisper 不支持异步）"""
     model = get_model()
 
-    # 写入临时文件（faster-whisper 需要文件路径）
-    with tempfile.NamedTemporaryFile(suffix=".webm", delete=False) as f:
-        f.write(audio_bytes)
-        temp_path = f.name
+    # faster-whisper 可以直接解码文件对象，不需要先落盘
+    segments, info = model.transcribe(audio_file, language="zh")
+    text = "".join([segment.text for segment in segments]).strip()
+    logger.debug("[ASR] Whisper 结果: %s", text)
+    return {"success": True, "text": text, "service": "whisper"}
+
+
+def warmup() -> None:
+    """预加载模型并跑一次空白音频推理，让首个请求不必等待加载"""
+    import numpy as np
 
+    model = get_model()
     try:
-        segments, info = model.transcribe(temp_path, language="zh")
-        text = "".join([segment.text for segment in segments]).strip()
-        print(f"[ASR] Whisper 结果: {text}")
-        return {"success": True, "text": text, "service": "whisper"}
-    finally:
-        os.unlink(temp_path)
+        segments, _ = model.transcribe(np.zeros(16000, dtype=np.float32), language="zh")
+        for _ in segments:
+            pass
+    except Exception as e:
+        logger.warning("[ASR] Whisper 预热推理失败: %s", e)
+
+
+async def preload() -> None:
+    """在专用线程池中预热模型"""
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(_executor, warmup)
 
 
-async def transcribe(audio_bytes: bytes, filename: str = "audio.webm") -> dict:
+async def transcribe(audio_file: BinaryIO, filename: str = "audio.webm") -> dict:
     """使用本地 Whisper 进行转写"""
-    print(f"[ASR] Whisper 转写, 音频: {len(audio_bytes)} bytes")
     # 在线程池中运行同步代码
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, transcribe_sync, audio_bytes)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, transcribe_sync, audio_file)
 
 
 def is_available() -> bool:
@@ -7,17 +7,31 @@
 """
 
 import os
-import uuid
+import re
+import asyncio
+import secrets
 import aiofiles
+import orjson
 from fastapi import APIRouter, HTTPException, UploadFile, File
 from pydantic import BaseModel
 
 router = APIRouter()
 
-# BGM 存储目录
-def get_bgm_root() -> str:
-    """获取 BGM 根目录"""
-    return os.path.join(os.path.dirname(os.path.dirname(__file__)), "static", "bgm")
+# 支持的音频格式（不带点的小写扩展名）
+AUDIO_EXTS = frozenset(("mp3", "wav", "ogg", "m4a"))
+
+# 上传限制：最大 10MB，按 64KB 分块写盘
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# 文件名中不安全的字符（保留字母数字，含中文，以及 . _ -）
+_UNSAFE_NAME_CHARS = re.compile(r"[^\w.-]")
+
+
+# BGM 存储目录（路径固定，导入时计算并创建一次）
+_BGM_ROOT = os.path.join(os.path.dirname(os.path.dirname(__file__)), "static", "bgm")
+_CUSTOM_DIR = os.path.join(_BGM_ROOT, "custom")
+os.makedirs(_CUSTOM_DIR, exist_ok=True)
 
 
 # 预设 BGM 列表
@@ -32,6 +46,11 @@ PRESET_BGM = [
 ]
 
 
+# 用户上传 BGM 的扫描结果缓存（按 custom 目录修改时间失效）
+_bgm_cache = {"mtime": None, "entries": []}
+_bgm_lock = asyncio.Lock()
+
+
 class BGMItem(BaseModel):
     """BGM 项"""
     id: str           # 文件名
@@ -39,38 +58,78 @@ class BGMItem(BaseModel):
     preset: bool      # 是否预设
 
 
+def _write_bytes(path: str, data: bytes) -> None:
+    """一次性写入小文件（打开、写入、关闭在同一个线程任务里完成）"""
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _delete_bgm_files(file_path: str) -> bool:
+    """删除 BGM 文件及其元数据文件，文件不存在时返回 False"""
+    try:
+        os.remove(file_path)
+    except FileNotFoundError:
+        return False
+
+    try:
+        os.remove(f"{file_path}.json")
+    except FileNotFoundError:
+        pass
+    return True
+
+
+def _scan_custom(custom_dir: str) -> list[dict]:
+    """一次 scandir 扫描用户上传的 BGM（元数据文件通过同目录文件名集合判断是否存在）"""
+    try:
+        with os.scandir(custom_dir) as it:
+            dir_entries = list(it)
+    except OSError:
+        return []
+
+    names = {entry.name for entry in dir_entries}
+    entries = []
+    for entry in dir_entries:
+        if not entry.is_file():
+            continue
+        base, dot, ext = entry.name.rpartition(".")
+        if not dot or ext.lower() not in AUDIO_EXTS:
+            continue
+
+        # 从文件名生成显示名称，如果有元数据文件，读取名称
+        name = base
+        meta_name = f"{entry.name}.json"
+        if meta_name in names:
+            try:
+                with open(os.path.join(custom_dir, meta_name), "rb") as f:
+                    name = orjson.loads(f.read()).get("name", name)
+            except (OSError, orjson.JSONDecodeError, AttributeError):
+                pass
+
+        entries.append({
+            "id": f"custom/{entry.name}",
+            "name": f"🎵 {name}",
+            "preset": False,
+        })
+    return entries
+
+
 @router.get("")
 async def list_bgm():
     """获取所有 BGM 列表（预设 + 用户上传）"""
-    bgm_list = list(PRESET_BGM)  # 复制预设列表
-
-    # 扫描用户上传的 BGM
-    bgm_root = get_bgm_root()
-    custom_dir = os.path.join(bgm_root, "custom")
-
-    if os.path.exists(custom_dir):
-        for filename in os.listdir(custom_dir):
-            if filename.endswith((".mp3", ".wav", ".ogg", ".m4a")):
-                # 从文件名生成显示名称
-                name = os.path.splitext(filename)[0]
-                # 如果有元数据文件，读取名称
-                meta_file = os.path.join(custom_dir, f"{filename}.json")
-                if os.path.exists(meta_file):
-                    import json
-                    try:
-                        with open(meta_file, "r", encoding="utf-8") as f:
-                            meta = json.load(f)
-                            name = meta.get("name", name)
-                    except:
-                        pass
-
-                bgm_list.append({
-                    "id": f"custom/{filename}",
-                    "name": f"🎵 {name}",
-                    "preset": False,
-                })
-
-    return {"bgm": bgm_list}
+    try:
+        mtime = os.stat(_CUSTOM_DIR).st_mtime_ns
+    except OSError:
+        return {"bgm": list(PRESET_BGM)}
+
+    # 目录有变化（或缓存被上传/删除清空）时才重新扫描，加锁避免并发重复扫描
+    if mtime != _bgm_cache["mtime"]:
+        async with _bgm_lock:
+            if mtime != _bgm_cache["mtime"]:
+                # 扫描和读取元数据是同步文件 I/O，放到线程池执行，避免阻塞事件循环
+                _bgm_cache["entries"] = await asyncio.to_thread(_scan_custom, _CUSTOM_DIR)
+                _bgm_cache["mtime"] = mtime
+
+    return {"bgm": PRESET_BGM + _bgm_cache["entries"]}
 
 
 @router.post("/upload")
@@ -83,35 +142,41 @@ async def upload_bgm(
     if not file.filename:
         raise HTTPException(status_code=400, detail="文件名不能为空")
 
-    ext = os.path.splitext(file.filename)[1].lower()
-    if ext not in [".mp3", ".wav", ".ogg", ".m4a"]:
+    _, dot, ext = file.filename.rpartition(".")
+    if not dot or ext.lower() not in AUDIO_EXTS:
         raise HTTPException(status_code=400, detail="只支持 mp3, wav, ogg, m4a 格式")
 
-    # 验证文件大小（最大 10MB）
-    content = await file.read()
-    if len(content) > 10 * 1024 * 1024:
+    # 已知大小（multipart 解析时得到）直接超限拒绝，不再读写任何数据
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
         raise HTTPException(status_code=400, detail="文件大小不能超过 10MB")
 
     # 生成唯一文件名
-    unique_id = str(uuid.uuid4())[:8]
-    safe_name = "".join(c for c in file.filename if c.isalnum() or c in "._-")
+    unique_id = secrets.token_hex(4)
+    safe_name = _UNSAFE_NAME_CHARS.sub("", file.filename)
     filename = f"{unique_id}_{safe_name}"
 
-    # 保存文件
-    bgm_root = get_bgm_root()
-    custom_dir = os.path.join(bgm_root, "custom")
-    os.makedirs(custom_dir, exist_ok=True)
-
-    file_path = os.path.join(custom_dir, filename)
+    # 保存文件：分块流式写盘，边写边统计大小，超过 10MB 立即中止并删除半成品
+    file_path = os.path.join(_CUSTOM_DIR, filename)
+    total = 0
+    too_large = False
     async with aiofiles.open(file_path, "wb") as f:
-        await f.write(content)
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            total += len(chunk)
+            if total > MAX_UPLOAD_BYTES:
+                too_large = True
+                break
+            await f.write(chunk)
+    if too_large:
+        await asyncio.to_thread(os.remove, file_path)
+        raise HTTPException(status_code=400, detail="文件大小不能超过 10MB")
 
     # 保存元数据（如果提供了自定义名称）
     display_name = name or os.path.splitext(file.filename)[0]
-    meta_file = os.path.join(custom_dir, f"{filename}.json")
-    import json
-    async with aiofiles.open(meta_file, "w", encoding="utf-8") as f:
-        await f.write(json.dumps({"name": display_name}, ensure_ascii=False))
+    meta_file = os.path.join(_CUSTOM_DIR, f"{filename}.json")
+    await asyncio.to_thread(_write_bytes, meta_file, orjson.dumps({"name": display_name}))
+
+    # 下次列表请求重新扫描
+    _bgm_cache["mtime"] = None
 
     return {
         "id": f"custom/{filename}",
@@ -127,18 +192,13 @@ async def delete_bgm(filename: str):
     if not filename.startswith("custom/"):
         raise HTTPException(status_code=403, detail="不能删除预设 BGM")
 
-    bgm_root = get_bgm_root()
-    file_path = os.path.join(bgm_root, filename)
+    file_path = os.path.join(_BGM_ROOT, filename)
 
-    if not os.path.exists(file_path):
+    # 删除文件和元数据都是同步文件 I/O，合并到一次线程池调用
+    if not await asyncio.to_thread(_delete_bgm_files, file_path):
         raise HTTPException(status_code=404, detail="BGM 不存在")
 
-    # 删除文件
-    os.remove(file_path)
-
-    # 删除元数据
-    meta_file = f"{file_path}.json"
-    if os.path.exists(meta_file):
-        os.remove(meta_file)
+    # 下次列表请求重新扫描
+    _bgm_cache["mtime"] = None
 
     return {"success": True, "message": "BGM 已删除"}
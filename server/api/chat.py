@@ -3,18 +3,22 @@
 支持意图预识别，讲故事场景直接读取故事文件，不经过 LLM 后处理。
 """
 
-import json
+import time
 import asyncio
+import orjson
+from collections import OrderedDict
 from typing import AsyncGenerator
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import StreamingResponse
+from sse_starlette.sse import EventSourceResponse
 from pydantic import BaseModel
 from langchain_core.messages import HumanMessage, AIMessage
 from langchain_openai import ChatOpenAI
 from agent import get_agent
 from config import get_settings
+from .sse import sse_event, sse_token, SSE_DONE
 from agent.intent import (
     detect_intent_with_cache,
+    Intent, ChatIntent,
     StoryIntent, ListStoriesIntent,
     PlaySongIntent, PauseSongIntent, ResumeSongIntent, StopSongIntent, NextSongIntent, ListSongsIntent,
 )
@@ -24,6 +28,27 @@ from agent.tools.songs import play_song, pause_song, resume_song, stop_song, nex
 router = APIRouter()
 
 
+# SSE 心跳间隔（秒）：LLM 思考较久时定期发送注释行，避免 Nginx/CDN 断开空闲连接
+SSE_PING_INTERVAL = 15
+
+# 会返回音乐控制 JSON 的工具，只有这些工具的输出需要解析
+MUSIC_TOOLS = frozenset(("play_song", "pause_song", "resume_song", "stop_song", "next_song"))
+
+# 故事正文每帧的大致字符数
+STORY_CHUNK_SIZE = 2048
+
+# 固定内容的 SSE 事件，启动时编码一次
+_STORY_ENDING = sse_event({'type': 'token', 'content': '\n\n好听吗？还想听别的故事吗？'})
+_LIST_STORIES_START = sse_event({'type': 'skill_start', 'name': 'list_stories', 'input': {}})
+_LIST_STORIES_ENDING = sse_event({'type': 'token', 'content': '\n\n想听哪个故事呀？告诉我故事名字就好！'})
+_LIST_SONGS_START = sse_event({'type': 'skill_start', 'name': 'list_songs', 'input': {}})
+# 不带歌曲信息的音乐控制事件（暂停/继续/停止）
+_MUSIC_ACTION_EVENTS = {
+    action: sse_event({'type': 'music', 'action': action})
+    for action in ("pause", "resume", "stop")
+}
+
+
 class ChatMessage(BaseModel):
     """聊天消息"""
     role: str  # "user" | "assistant"
@@ -44,6 +69,20 @@ class ChatRequest(BaseModel):
     image: str | None = None  # base64 图片（可选，用于图片问答）
 
 
+# 历史消息角色 -> 消息类型
+_ROLE_MESSAGE_CLS = {"user": HumanMessage, "assistant": AIMessage}
+
+
+def _user_content(text: str, image: str | None) -> str | list:
+    """用户消息内容：带图片时构造多模态内容"""
+    if not image:
+        return text
+    return [
+        {"type": "text", "text": text},
+        {"type": "image_url", "image_url": {"url": image}}
+    ]
+
+
 def build_messages(message: str, history: list[ChatMessage], image: str | None = None) -> list:
     """构建消息列表（支持多模态）
 
@@ -52,223 +91,162 @@ def build_messages(message: str, history: list[ChatMessage], image: str | None =
         history: 历史消息列表
         image: base64 图片（可选）
     """
-    messages = []
-    for msg in history:
-        if msg.role == "user":
-            # 检查历史消息是否带图片
-            if msg.image:
-                messages.append(HumanMessage(content=[
-                    {"type": "text", "text": msg.content},
-                    {"type": "image_url", "image_url": {"url": msg.image}}
-                ]))
-            else:
-                messages.append(HumanMessage(content=msg.content))
-        elif msg.role == "assistant":
-            messages.append(AIMessage(content=msg.content))
+    # 历史消息（只有用户消息可能带图片），未知角色直接跳过
+    messages = [
+        _ROLE_MESSAGE_CLS[msg.role](
+            content=_user_content(msg.content, msg.image) if msg.role == "user" else msg.content
+        )
+        for msg in history
+        if msg.role in _ROLE_MESSAGE_CLS
+    ]
 
     # 当前消息（可能带图片）
-    if image:
-        messages.append(HumanMessage(content=[
-            {"type": "text", "text": message},
-            {"type": "image_url", "image_url": {"url": image}}
-        ]))
-    else:
-        messages.append(HumanMessage(content=message))
+    messages.append(HumanMessage(content=_user_content(message, image)))
 
     return messages
 
 
+def find_story_bgm(story_name: str | None = None) -> str | None:
+    """查找故事的 BGM 信息（只查故事元数据索引，不逐个读取故事文件）"""
+    from agent.tools.storytelling import get_story_index, find_story_id, pick_random_story_id
+
+    index = get_story_index()
+    if not index:
+        return None
+
+    story_id = find_story_id(story_name) if story_name else pick_random_story_id()
+    story = index.get(story_id) if story_id else None
+    return story.get("bgm") if story else None
+
+
 async def stream_story_direct(
     story_name: str | None = None,
     assistant_name: str = "小智",
-) -> AsyncGenerator[str, None]:
+) -> AsyncGenerator[bytes, None]:
     """
     直接流式返回故事内容（不经过 LLM）
 
     这样可以避免 LLM 总结或改写故事内容。
     """
-    from agent.tools.storytelling import load_story, get_all_story_ids
-    import random
-
-    # 获取故事及其 BGM 信息
-    story_bgm = None
-    story_ids = get_all_story_ids()
-
-    if story_name and story_ids:
-        # 尝试匹配故事
-        for story_id in story_ids:
-            story_data = load_story(story_id)
-            if story_data:
-                if story_id == story_name or (story_name.lower() in story_data["title"].lower()):
-                    story_bgm = story_data.get("bgm")
-                    break
-    elif story_ids:
-        # 随机选择故事
-        story_id = random.choice(story_ids)
-        story_data = load_story(story_id)
-        if story_data:
-            story_bgm = story_data.get("bgm")
+    # 索引过期时需要重新扫描故事目录，放到线程池执行，避免阻塞事件循环
+    story_bgm = await asyncio.to_thread(find_story_bgm, story_name)
 
     # 直接调用 tell_story 工具获取故事
-    # 注意：tell_story 是 @tool 装饰的，需要用 .invoke() 调用
-    story_content = tell_story.invoke({"story_name": story_name or ""})
+    # 注意：tell_story 是 @tool 装饰的同步工具，ainvoke 会在线程池中执行
+    story_content = await tell_story.ainvoke({"story_name": story_name or ""})
 
     # 发送工具调用开始事件（用于前端显示，包含 bgm 信息）
-    yield f"data: {json.dumps({'type': 'skill_start', 'name': 'tell_story', 'input': {'story_name': story_name}, 'bgm': story_bgm}, ensure_ascii=False)}\n\n"
+    yield sse_event({'type': 'skill_start', 'name': 'tell_story', 'input': {'story_name': story_name}, 'bgm': story_bgm})
 
     # 发送工具调用完成事件
-    yield f"data: {json.dumps({'type': 'skill_end', 'name': 'tell_story', 'output': story_content[:200]}, ensure_ascii=False)}\n\n"
+    yield sse_event({'type': 'skill_end', 'name': 'tell_story', 'output': story_content[:200]})
 
-    # 流式输出故事内容（模拟逐字输出效果）
-    # 为了更自然的流式体验，按段落输出
-    # 按段落分割
-    paragraphs = story_content.split('\n')
-    for para in paragraphs:
+    # 按段落流式输出故事内容（不人为延迟，打字效果由前端负责）
+    # 相邻段落合并成约 2KB 一帧，减少 SSE 帧数
+    buf = []
+    size = 0
+    for para in story_content.split('\n'):
         if para.strip():
-            # 输出段落内容
-            yield f"data: {json.dumps({'type': 'token', 'content': para}, ensure_ascii=False)}\n\n"
-            await asyncio.sleep(0.05)  # 小延迟，更自然
-        # 输出换行
-        yield f"data: {json.dumps({'type': 'token', 'content': chr(10)}, ensure_ascii=False)}\n\n"
+            buf.append(para)
+            size += len(para)
+        buf.append('\n')
+        size += 1
+        if size >= STORY_CHUNK_SIZE:
+            yield sse_token(''.join(buf))
+            buf.clear()
+            size = 0
+    if buf:
+        yield sse_token(''.join(buf))
 
     # 添加互动结尾
-    ending = f"\n\n好听吗？还想听别的故事吗？"
-    yield f"data: {json.dumps({'type': 'token', 'content': ending}, ensure_ascii=False)}\n\n"
+    yield _STORY_ENDING
 
     # 完成
-    yield f"data: {json.dumps({'type': 'done'})}\n\n"
+    yield SSE_DONE
 
 
-async def stream_list_stories_direct() -> AsyncGenerator[str, None]:
+async def stream_list_stories_direct() -> AsyncGenerator[bytes, None]:
     """
     直接流式返回故事列表（不经过 LLM）
     """
     # 调用 list_stories 工具
-    stories_content = list_stories.invoke({})
+    stories_content = await list_stories.ainvoke({})
 
     # 发送工具调用事件
-    yield f"data: {json.dumps({'type': 'skill_start', 'name': 'list_stories', 'input': {}}, ensure_ascii=False)}\n\n"
-    yield f"data: {json.dumps({'type': 'skill_end', 'name': 'list_stories', 'output': stories_content[:200]}, ensure_ascii=False)}\n\n"
+    yield _LIST_STORIES_START
+    yield sse_event({'type': 'skill_end', 'name': 'list_stories', 'output': stories_content[:200]})
 
     # 输出内容
-    yield f"data: {json.dumps({'type': 'token', 'content': stories_content}, ensure_ascii=False)}\n\n"
+    yield sse_token(stories_content)
 
     # 添加引导
-    ending = "\n\n想听哪个故事呀？告诉我故事名字就好！"
-    yield f"data: {json.dumps({'type': 'token', 'content': ending}, ensure_ascii=False)}\n\n"
+    yield _LIST_STORIES_ENDING
 
     # 完成
-    yield f"data: {json.dumps({'type': 'done'})}\n\n"
+    yield SSE_DONE
 
 
-async def stream_play_song_direct(song_name: str | None = None) -> AsyncGenerator[str, None]:
+async def stream_play_song_direct(song_name: str | None = None) -> AsyncGenerator[bytes, None]:
     """
     直接播放儿歌（不经过 LLM）
     """
     # 调用 play_song 工具
-    result = play_song.invoke({"song_name": song_name or ""})
-    data = json.loads(result)
+    result = await play_song.ainvoke({"song_name": song_name or ""})
+    data = orjson.loads(result)
 
     # 发送工具调用事件
-    yield f"data: {json.dumps({'type': 'skill_start', 'name': 'play_song', 'input': {'song_name': song_name}}, ensure_ascii=False)}\n\n"
-    yield f"data: {json.dumps({'type': 'skill_end', 'name': 'play_song', 'output': data.get('message', '')[:200]}, ensure_ascii=False)}\n\n"
+    yield sse_event({'type': 'skill_start', 'name': 'play_song', 'input': {'song_name': song_name}})
+    yield sse_event({'type': 'skill_end', 'name': 'play_song', 'output': data.get('message', '')[:200]})
 
     # 发送音乐控制事件
     if data.get("action") == "play" and data.get("song"):
-        yield f"data: {json.dumps({'type': 'music', 'action': 'play', 'song': data['song']}, ensure_ascii=False)}\n\n"
-
-    # 输出消息
-    yield f"data: {json.dumps({'type': 'token', 'content': data.get('message', '')}, ensure_ascii=False)}\n\n"
-
-    # 完成
-    yield f"data: {json.dumps({'type': 'done'})}\n\n"
-
-
-async def stream_pause_song_direct() -> AsyncGenerator[str, None]:
-    """
-    暂停儿歌播放
-    """
-    result = pause_song.invoke({})
-    data = json.loads(result)
-
-    # 发送音乐控制事件
-    yield f"data: {json.dumps({'type': 'music', 'action': 'pause'}, ensure_ascii=False)}\n\n"
+        yield sse_event({'type': 'music', 'action': 'play', 'song': data['song']})
 
     # 输出消息
-    yield f"data: {json.dumps({'type': 'token', 'content': data.get('message', '')}, ensure_ascii=False)}\n\n"
+    yield sse_token(data.get('message', ''))
 
     # 完成
-    yield f"data: {json.dumps({'type': 'done'})}\n\n"
+    yield SSE_DONE
 
 
-async def stream_resume_song_direct() -> AsyncGenerator[str, None]:
+async def stream_song_action(song_tool, action: str) -> AsyncGenerator[bytes, None]:
     """
-    继续播放儿歌
+    儿歌控制（暂停/继续/停止/下一首）的通用流：调用工具，发送音乐控制事件和提示消息
     """
-    result = resume_song.invoke({})
-    data = json.loads(result)
+    data = orjson.loads(await song_tool.ainvoke({}))
 
-    # 发送音乐控制事件
-    yield f"data: {json.dumps({'type': 'music', 'action': 'resume'}, ensure_ascii=False)}\n\n"
+    # 发送音乐控制事件（工具返回 action 为 none 时不发送，如没有下一首）
+    if data.get("action") == action:
+        if data.get("song"):
+            yield sse_event({'type': 'music', 'action': action, 'song': data['song']})
+        elif action in _MUSIC_ACTION_EVENTS:
+            yield _MUSIC_ACTION_EVENTS[action]
+        else:
+            yield sse_event({'type': 'music', 'action': action})
 
     # 输出消息
-    yield f"data: {json.dumps({'type': 'token', 'content': data.get('message', '')}, ensure_ascii=False)}\n\n"
+    yield sse_token(data.get('message', ''))
 
     # 完成
-    yield f"data: {json.dumps({'type': 'done'})}\n\n"
+    yield SSE_DONE
 
 
-async def stream_stop_song_direct() -> AsyncGenerator[str, None]:
-    """
-    停止播放儿歌
-    """
-    result = stop_song.invoke({})
-    data = json.loads(result)
-
-    # 发送音乐控制事件
-    yield f"data: {json.dumps({'type': 'music', 'action': 'stop'}, ensure_ascii=False)}\n\n"
-
-    # 输出消息
-    yield f"data: {json.dumps({'type': 'token', 'content': data.get('message', '')}, ensure_ascii=False)}\n\n"
-
-    # 完成
-    yield f"data: {json.dumps({'type': 'done'})}\n\n"
-
-
-async def stream_next_song_direct() -> AsyncGenerator[str, None]:
-    """
-    播放下一首儿歌
-    """
-    result = next_song.invoke({})
-    data = json.loads(result)
-
-    # 发送音乐控制事件
-    if data.get("action") == "next" and data.get("song"):
-        yield f"data: {json.dumps({'type': 'music', 'action': 'next', 'song': data['song']}, ensure_ascii=False)}\n\n"
-
-    # 输出消息
-    yield f"data: {json.dumps({'type': 'token', 'content': data.get('message', '')}, ensure_ascii=False)}\n\n"
-
-    # 完成
-    yield f"data: {json.dumps({'type': 'done'})}\n\n"
-
-
-async def stream_list_songs_direct() -> AsyncGenerator[str, None]:
+async def stream_list_songs_direct() -> AsyncGenerator[bytes, None]:
     """
     直接返回儿歌列表（不经过 LLM）
     """
     # 调用 list_songs 工具
-    songs_content = list_songs_tool.invoke({})
+    songs_content = await list_songs_tool.ainvoke({})
 
     # 发送工具调用事件
-    yield f"data: {json.dumps({'type': 'skill_start', 'name': 'list_songs', 'input': {}}, ensure_ascii=False)}\n\n"
-    yield f"data: {json.dumps({'type': 'skill_end', 'name': 'list_songs', 'output': songs_content[:200]}, ensure_ascii=False)}\n\n"
+    yield _LIST_SONGS_START
+    yield sse_event({'type': 'skill_end', 'name': 'list_songs', 'output': songs_content[:200]})
 
     # 输出内容
-    yield f"data: {json.dumps({'type': 'token', 'content': songs_content}, ensure_ascii=False)}\n\n"
+    yield sse_token(songs_content)
 
     # 完成
-    yield f"data: {json.dumps({'type': 'done'})}\n\n"
+    yield SSE_DONE
 
 
 async def stream_vision_response(
@@ -278,7 +256,7 @@ async def stream_vision_response(
     model: str,
     temperature: float | None = None,
     assistant_name: str | None = None,
-) -> AsyncGenerator[str, None]:
+) -> AsyncGenerator[bytes, None]:
     """
     使用视觉模型流式回答图片问题（不使用工具）
 
@@ -319,14 +297,14 @@ async def stream_vision_response(
         # 流式生成
         async for chunk in llm.astream(messages):
             if chunk.content:
-                yield f"data: {json.dumps({'type': 'token', 'content': chunk.content}, ensure_ascii=False)}\n\n"
+                yield sse_token(chunk.content)
 
         # 完成
-        yield f"data: {json.dumps({'type': 'done'})}\n\n"
+        yield SSE_DONE
 
     except Exception as e:
         print(f"[Vision] 错误: {e}")
-        yield f"data: {json.dumps({'type': 'error', 'message': str(e)}, ensure_ascii=False)}\n\n"
+        yield sse_event({'type': 'error', 'message': str(e)})
 
 
 async def stream_agent_response(
@@ -337,7 +315,7 @@ async def stream_agent_response(
     max_tokens: int | None = None,
     assistant_name: str | None = None,
     image: str | None = None,
-) -> AsyncGenerator[str, None]:
+) -> AsyncGenerator[bytes, None]:
     """
     流式生成 Agent 响应
 
@@ -369,13 +347,13 @@ async def stream_agent_response(
                     # 过滤掉工具调用的 content（通常是空的或者是工具调用 JSON）
                     content = chunk.content
                     if isinstance(content, str) and content:
-                        yield f"data: {json.dumps({'type': 'token', 'content': content}, ensure_ascii=False)}\n\n"
+                        yield sse_token(content)
 
             elif event_type == "on_tool_start":
                 # 工具开始调用
                 tool_name = event.get("name", "unknown")
                 tool_input = event_data.get("input", {})
-                yield f"data: {json.dumps({'type': 'skill_start', 'name': tool_name, 'input': tool_input}, ensure_ascii=False)}\n\n"
+                yield sse_event({'type': 'skill_start', 'name': tool_name, 'input': tool_input})
 
             elif event_type == "on_tool_end":
                 # 工具调用完成
@@ -391,27 +369,69 @@ async def stream_agent_response(
                 else:
                     output_str = str(tool_output)
 
-                yield f"data: {json.dumps({'type': 'skill_end', 'name': tool_name, 'output': output_str[:200]}, ensure_ascii=False)}\n\n"
+                yield sse_event({'type': 'skill_end', 'name': tool_name, 'output': output_str[:200]})
 
                 # 如果是音乐工具，解析输出并发送音乐控制事件
-                if tool_name in ["play_song", "pause_song", "resume_song", "stop_song", "next_song"]:
+                if tool_name in MUSIC_TOOLS:
                     try:
-                        music_data = json.loads(output_str)
+                        music_data = orjson.loads(output_str)
                         action = music_data.get("action")
                         if action and action != "none":
                             music_event = {"type": "music", "action": action}
                             if music_data.get("song"):
                                 music_event["song"] = music_data["song"]
-                            yield f"data: {json.dumps(music_event, ensure_ascii=False)}\n\n"
+                            yield sse_event(music_event)
                             print(f"[Chat] 发送音乐事件: {music_event}")
-                    except (json.JSONDecodeError, TypeError) as e:
+                    except (orjson.JSONDecodeError, TypeError) as e:
                         print(f"[Chat] 解析音乐事件失败: {e}, output={output_str[:100]}")
 
         # 发送完成事件
-        yield f"data: {json.dumps({'type': 'done'})}\n\n"
+        yield SSE_DONE
 
     except Exception as e:
-        yield f"data: {json.dumps({'type': 'error', 'message': str(e)}, ensure_ascii=False)}\n\n"
+        yield sse_event({'type': 'error', 'message': str(e)})
+
+
+# 意图识别结果的短期缓存：(消息, 模型) -> (时间, 意图)，"讲故事"、"下一首"这类重复说法不用再走识别
+INTENT_CACHE_TTL = 300.0
+MAX_CACHED_INTENTS = 256
+_intent_cache: OrderedDict[tuple[str, str | None], tuple[float, Intent]] = OrderedDict()
+
+
+async def detect_intent_cached(message: str, model: str | None = None) -> Intent:
+    """带 TTL/LRU 缓存的意图识别
+
+    普通聊天意图不缓存：LLM 识别失败时也会退回聊天意图，不应被缓存下来。
+    """
+    key = (message.strip(), model)
+    cached = _intent_cache.get(key)
+    if cached and time.monotonic() - cached[0] < INTENT_CACHE_TTL:
+        _intent_cache.move_to_end(key)
+        return cached[1]
+
+    intent = await detect_intent_with_cache(message, model=model)
+    if not isinstance(intent, ChatIntent):
+        _intent_cache[key] = (time.monotonic(), intent)
+        _intent_cache.move_to_end(key)
+        if len(_intent_cache) > MAX_CACHED_INTENTS:
+            _intent_cache.popitem(last=False)
+    return intent
+
+
+# 意图类型 -> 直接处理的流生成器（意图类都是叶子类型，按 type 精确查表）
+_DIRECT_HANDLERS = {
+    StoryIntent: lambda intent, request: stream_story_direct(
+        story_name=intent.story_name,
+        assistant_name=request.assistant_name or "小智",
+    ),
+    ListStoriesIntent: lambda intent, request: stream_list_stories_direct(),
+    PlaySongIntent: lambda intent, request: stream_play_song_direct(song_name=intent.song_name),
+    PauseSongIntent: lambda intent, request: stream_song_action(pause_song, "pause"),
+    ResumeSongIntent: lambda intent, request: stream_song_action(resume_song, "resume"),
+    StopSongIntent: lambda intent, request: stream_song_action(stop_song, "stop"),
+    NextSongIntent: lambda intent, request: stream_song_action(next_song, "next"),
+    ListSongsIntent: lambda intent, request: stream_list_songs_direct(),
+}
 
 
 @router.post("/chat")
@@ -439,7 +459,7 @@ async def chat(request: ChatRequest):
         settings = get_settings()
         vision_model = settings.VISION_MODEL
         print(f"[Chat] 带图片消息，使用视觉模型: {vision_model}")
-        return StreamingResponse(
+        return EventSourceResponse(
             stream_vision_response(
                 request.message,
                 request.image,
@@ -448,124 +468,24 @@ async def chat(request: ChatRequest):
                 temperature=request.temperature,
                 assistant_name=request.assistant_name,
             ),
-            media_type="text/event-stream",
-            headers={
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-                "X-Accel-Buffering": "no",
-            }
+            ping=SSE_PING_INTERVAL,
         )
 
     # Step 1: 意图识别
-    intent = await detect_intent_with_cache(request.message, model=request.model)
+    intent = await detect_intent_cached(request.message, model=request.model)
     print(f"[Chat] 意图识别结果: {intent}")
 
-    # Step 2: 根据意图分流
-    if isinstance(intent, StoryIntent):
-        # 讲故事：直接读取故事文件，不经过 LLM
-        print(f"[Chat] 直接讲故事: {intent.story_name or '随机'}")
-        return StreamingResponse(
-            stream_story_direct(
-                story_name=intent.story_name,
-                assistant_name=request.assistant_name or "小智",
-            ),
-            media_type="text/event-stream",
-            headers={
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-                "X-Accel-Buffering": "no",
-            }
-        )
-
-    if isinstance(intent, ListStoriesIntent):
-        # 查故事列表：直接返回列表
-        print("[Chat] 直接返回故事列表")
-        return StreamingResponse(
-            stream_list_stories_direct(),
-            media_type="text/event-stream",
-            headers={
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-                "X-Accel-Buffering": "no",
-            }
-        )
-
-    # 儿歌相关意图
-    if isinstance(intent, PlaySongIntent):
-        print(f"[Chat] 播放儿歌: {intent.song_name or '随机'}")
-        return StreamingResponse(
-            stream_play_song_direct(song_name=intent.song_name),
-            media_type="text/event-stream",
-            headers={
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-                "X-Accel-Buffering": "no",
-            }
-        )
-
-    if isinstance(intent, PauseSongIntent):
-        print("[Chat] 暂停儿歌")
-        return StreamingResponse(
-            stream_pause_song_direct(),
-            media_type="text/event-stream",
-            headers={
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-                "X-Accel-Buffering": "no",
-            }
-        )
-
-    if isinstance(intent, ResumeSongIntent):
-        print("[Chat] 继续播放儿歌")
-        return StreamingResponse(
-            stream_resume_song_direct(),
-            media_type="text/event-stream",
-            headers={
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-                "X-Accel-Buffering": "no",
-            }
-        )
-
-    if isinstance(intent, StopSongIntent):
-        print("[Chat] 停止播放儿歌")
-        return StreamingResponse(
-            stream_stop_song_direct(),
-            media_type="text/event-stream",
-            headers={
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-                "X-Accel-Buffering": "no",
-            }
-        )
-
-    if isinstance(intent, NextSongIntent):
-        print("[Chat] 下一首儿歌")
-        return StreamingResponse(
-            stream_next_song_direct(),
-            media_type="text/event-stream",
-            headers={
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-                "X-Accel-Buffering": "no",
-            }
-        )
-
-    if isinstance(intent, ListSongsIntent):
-        print("[Chat] 返回儿歌列表")
-        return StreamingResponse(
-            stream_list_songs_direct(),
-            media_type="text/event-stream",
-            headers={
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-                "X-Accel-Buffering": "no",
-            }
+    # Step 2: 根据意图分流（讲故事/查列表/儿歌控制直接处理，不经过 LLM）
+    handler = _DIRECT_HANDLERS.get(type(intent))
+    if handler:
+        return EventSourceResponse(
+            handler(intent, request),
+            ping=SSE_PING_INTERVAL,
         )
 
     # Step 3: 其他意图，走正常 Agent 流程
     print("[Chat] 走 Agent 流程")
-    return StreamingResponse(
+    return EventSourceResponse(
         stream_agent_response(
             request.message,
             request.history,
@@ -575,12 +495,7 @@ async def chat(request: ChatRequest):
             assistant_name=request.assistant_name,
             image=request.image,
         ),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-        }
+        ping=SSE_PING_INTERVAL,
     )
 
 
@@ -9,8 +9,11 @@
 
 import os
 import json
+import asyncio
 import aiofiles
-from fastapi import APIRouter, HTTPException
+import orjson
+from functools import lru_cache
+from fastapi import APIRouter, HTTPException, Response
 from pydantic import BaseModel
 from openai import AsyncOpenAI
 from config import get_settings
@@ -19,16 +22,19 @@ from agent.skills_loader import (
     load_skill_content,
     discover_skills,
     get_skill_by_id,
+    get_skills_root,
+    get_registry_version,
     SkillMetadata,
 )
+from agent.tools.storytelling import load_story_meta, invalidate_story_index
+from agent.tools.poetry import invalidate_poem_index
 
 router = APIRouter()
 settings = get_settings()
 
-# 获取技能目录（从 skills_loader 模块）
-def get_skills_root() -> str:
-    """获取技能根目录"""
-    return os.path.join(os.path.dirname(os.path.dirname(__file__)), "skills")
+# 技能列表/详情的响应体缓存：(注册表版本号, JSON 字节)，重新发现技能后自动失效
+_list_skills_cache: tuple[int, bytes] | None = None
+_skill_detail_cache: dict[str, tuple[int, bytes]] = {}
 
 
 class Story(BaseModel):
@@ -100,8 +106,9 @@ class StoryGenerateRequest(BaseModel):
     title: str
 
 
+@lru_cache(maxsize=256)
 def get_skill_path(skill_id: str) -> str:
-    """获取技能目录路径"""
+    """获取技能目录路径（只拼接一次）"""
     return os.path.join(get_skills_root(), skill_id)
 
 
@@ -112,32 +119,49 @@ def get_stories_path(skill_id: str) -> str:
     return os.path.join(get_skill_path(skill_id), content_dir)
 
 
+def _invalidate_content_indexes() -> None:
+    """故事/古诗文件被增删改后，让工具的内存索引立即重建（不等定时检查）"""
+    invalidate_story_index()
+    invalidate_poem_index()
+
+
 @router.get("")
 async def list_skills():
     """获取所有技能列表（只返回元数据，支持渐进加载）"""
+    global _list_skills_cache
+
     registry = get_skill_registry()
-    skills = []
-    for skill in registry.values():
-        skills.append({
-            "id": skill.id,
-            "name": skill.name,
-            "version": skill.version,
-            "icon": skill.icon,
-            "keywords": skill.keywords,
-            "triggers": skill.triggers[:3] if skill.triggers else [],  # 只返回前3个触发条件
-            "tools": skill.tools,
-        })
-    return {"skills": skills}
+    version = get_registry_version()
+    if _list_skills_cache is None or _list_skills_cache[0] != version:
+        skills = []
+        for skill in registry.values():
+            skills.append({
+                "id": skill.id,
+                "name": skill.name,
+                "version": skill.version,
+                "icon": skill.icon,
+                "keywords": skill.keywords,
+                "triggers": skill.triggers[:3] if skill.triggers else [],  # 只返回前3个触发条件
+                "tools": skill.tools,
+            })
+        _list_skills_cache = (version, orjson.dumps({"skills": skills}))
+
+    return Response(content=_list_skills_cache[1], media_type="application/json")
 
 
 @router.get("/{skill_id}")
 async def get_skill(skill_id: str):
     """获取技能完整内容（按需加载）"""
+    version = get_registry_version()
+    cached = _skill_detail_cache.get(skill_id)
+    if cached and cached[0] == version:
+        return Response(content=cached[1], media_type="application/json")
+
     content = load_skill_content(skill_id)
     if not content:
         raise HTTPException(status_code=404, detail=f"技能 {skill_id} 不存在")
 
-    return {
+    body = orjson.dumps({
         "id": content.metadata.id,
         "name": content.metadata.name,
         "version": content.metadata.version,
@@ -146,7 +170,9 @@ async def get_skill(skill_id: str):
         "triggers": content.metadata.triggers,
         "tools": content.metadata.tools,
         "content": content.full_content,
-    }
+    })
+    _skill_detail_cache[skill_id] = (version, body)
+    return Response(content=body, media_type="application/json")
 
 
 @router.post("/reload")
@@ -160,6 +186,24 @@ async def reload_skills():
     }
 
 
+def _scan_story_summaries(stories_path: str) -> list[dict]:
+    """列出目录下所有故事的 ID、标题和 BGM（复用讲故事工具的元数据解析和缓存，只读文件开头）"""
+    stories = []
+    with os.scandir(stories_path) as it:
+        for entry in it:
+            if not entry.name.endswith(".md") or not entry.is_file():
+                continue
+            meta = load_story_meta(entry.name[:-3], entry)
+            if meta:
+                stories.append({
+                    "id": meta["id"],
+                    "title": meta["title"],
+                    "filename": entry.name,
+                    "bgm": meta["bgm"],
+                })
+    return stories
+
+
 @router.get("/{skill_id}/stories")
 async def list_stories(skill_id: str):
     """获取技能的故事列表"""
@@ -167,31 +211,8 @@ async def list_stories(skill_id: str):
     if not os.path.exists(stories_path):
         return {"stories": []}
 
-    stories = []
-    for filename in os.listdir(stories_path):
-        if filename.endswith(".md"):
-            story_id = filename[:-3]
-            file_path = os.path.join(stories_path, filename)
-            async with aiofiles.open(file_path, "r", encoding="utf-8") as f:
-                content = await f.read()
-
-                # 解析 frontmatter
-                frontmatter, body = parse_story_frontmatter(content)
-
-                # 从正文中提取标题
-                title = story_id
-                for line in body.split("\n"):
-                    if line.startswith("# "):
-                        title = line[2:].strip()
-                        break
-
-                stories.append({
-                    "id": story_id,
-                    "title": title,
-                    "filename": filename,
-                    "bgm": frontmatter.get("bgm"),
-                })
-
+    # 目录扫描和文件读取放到线程里，不阻塞事件循环
+    stories = await asyncio.to_thread(_scan_story_summaries, stories_path)
     return {"stories": stories}
 
 
@@ -241,6 +262,7 @@ async def create_story(skill_id: str, story: StoryCreate):
 
     async with aiofiles.open(file_path, "w", encoding="utf-8") as f:
         await f.write(content)
+    _invalidate_content_indexes()
 
     return {
         "id": story_id,
@@ -287,6 +309,7 @@ async def update_story(skill_id: str, story_id: str, story: StoryUpdate):
 
     async with aiofiles.open(file_path, "w", encoding="utf-8") as f:
         await f.write(new_content)
+    _invalidate_content_indexes()
 
     return {
         "id": story_id,
@@ -304,6 +327,7 @@ async def delete_story(skill_id: str, story_id: str):
         raise HTTPException(status_code=404, detail=f"故事 {story_id} 不存在")
 
     os.remove(file_path)
+    _invalidate_content_indexes()
     return {"success": True, "message": f"故事 {story_id} 已删除"}
 
 
@@ -9,37 +9,46 @@
 """
 
 import os
-import json
 import re
 import uuid
+import asyncio
+import aiofiles
+import orjson
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form
 from fastapi.responses import FileResponse
 from pydantic import BaseModel
+from agent.tools.songs import load_songs_index, get_song_by_id, find_song_by_name, reload_songs
 
 router = APIRouter()
 
+# 上传文件按 64KB 分块写盘
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# 上传/删除时 index.json 的"读取-修改-写回"需要串行，避免并发请求互相覆盖
+_index_lock = asyncio.Lock()
+
 
 def get_songs_root() -> str:
     """获取儿歌根目录"""
     return os.path.join(os.path.dirname(os.path.dirname(__file__)), "skills", "songs")
 
 
-def load_songs_index() -> list:
-    """加载歌曲索引"""
+def save_songs_index(songs: list) -> None:
+    """保存歌曲索引（同步文件 I/O，在线程池中调用）"""
     index_file = os.path.join(get_songs_root(), "index.json")
-    if not os.path.exists(index_file):
-        return []
+    with open(index_file, "wb") as f:
+        f.write(orjson.dumps({"songs": songs}, option=orjson.OPT_INDENT_2))
 
-    with open(index_file, "r", encoding="utf-8") as f:
-        data = json.load(f)
-        return data.get("songs", [])
+    # 同步刷新播放工具的歌曲索引缓存
+    reload_songs()
 
 
-def save_songs_index(songs: list) -> None:
-    """保存歌曲索引"""
-    index_file = os.path.join(get_songs_root(), "index.json")
-    with open(index_file, "w", encoding="utf-8") as f:
-        json.dump({"songs": songs}, f, ensure_ascii=False, indent=2)
+def _remove_file(file_path: str) -> None:
+    """删除文件，文件不存在时忽略（同步文件 I/O，在线程池中调用）"""
+    try:
+        os.remove(file_path)
+    except FileNotFoundError:
+        pass
 
 
 class SongItem(BaseModel):
@@ -66,11 +75,10 @@ async def list_songs():
 @router.get("/{song_id}")
 async def get_song(song_id: str):
     """获取单个歌曲信息"""
-    songs = load_songs_index()
-    for song in songs:
-        if song["id"] == song_id:
-            return song
-    raise HTTPException(status_code=404, detail="歌曲不存在")
+    song = get_song_by_id(song_id)
+    if not song:
+        raise HTTPException(status_code=404, detail="歌曲不存在")
+    return song
 
 
 @router.get("/audio/{filename}")
@@ -79,7 +87,7 @@ async def get_song_audio(filename: str):
     audio_dir = os.path.join(get_songs_root(), "audio")
     file_path = os.path.join(audio_dir, filename)
 
-    if not os.path.exists(file_path):
+    if not await asyncio.to_thread(os.path.isfile, file_path):
         raise HTTPException(status_code=404, detail="音频文件不存在")
 
     return FileResponse(
@@ -90,20 +98,8 @@ async def get_song_audio(filename: str):
 
 
 def find_song_by_keyword(keyword: str) -> dict | None:
-    """根据关键词查找歌曲"""
-    songs = load_songs_index()
-    keyword_lower = keyword.lower()
-
-    for song in songs:
-        # 精确匹配标题
-        if keyword_lower == song["title"].lower() or keyword_lower == song["title_en"].lower():
-            return song
-        # 关键词匹配
-        for kw in song["keywords"]:
-            if keyword_lower in kw.lower() or kw.lower() in keyword_lower:
-                return song
-
-    return None
+    """根据关键词查找歌曲（标题精确匹配查字典，关键词匹配扫描预先小写的关键词表）"""
+    return find_song_by_name(keyword)
 
 
 def get_random_song() -> dict | None:
@@ -153,15 +149,14 @@ async def upload_song(
     # 用 ID 作为前缀避免重名
     final_filename = f"{song_id}_{safe_filename}"
 
-    # 确保 audio 目录存在
+    # 保存文件：分块流式写盘，不把整首歌读进内存
     audio_dir = os.path.join(get_songs_root(), "audio")
-    os.makedirs(audio_dir, exist_ok=True)
+    await asyncio.to_thread(os.makedirs, audio_dir, exist_ok=True)
 
-    # 保存文件
     file_path = os.path.join(audio_dir, final_filename)
-    content = await file.read()
-    with open(file_path, "wb") as f:
-        f.write(content)
+    async with aiofiles.open(file_path, "wb") as f:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            await f.write(chunk)
 
     # 解析关键词
     kw_list = [k.strip() for k in keywords.split(",") if k.strip()]
@@ -169,8 +164,7 @@ async def upload_song(
     if title not in kw_list:
         kw_list.insert(0, title)
 
-    # 添加到索引
-    songs = load_songs_index()
+    # 添加到索引（缓存中的列表是共享的，复制一份再修改）
     new_song = {
         "id": song_id,
         "title": title,
@@ -178,8 +172,9 @@ async def upload_song(
         "file": final_filename,
         "keywords": kw_list,
     }
-    songs.append(new_song)
-    save_songs_index(songs)
+    async with _index_lock:
+        songs = [*load_songs_index(), new_song]
+        await asyncio.to_thread(save_songs_index, songs)
 
     return new_song
 
@@ -187,26 +182,17 @@ async def upload_song(
 @router.delete("/{song_id}")
 async def delete_song(song_id: str):
     """删除儿歌"""
-    songs = load_songs_index()
-
-    # 查找歌曲
-    song_to_delete = None
-    for song in songs:
-        if song["id"] == song_id:
-            song_to_delete = song
-            break
-
+    song_to_delete = get_song_by_id(song_id)
     if not song_to_delete:
         raise HTTPException(status_code=404, detail="歌曲不存在")
 
     # 删除音频文件
-    audio_dir = os.path.join(get_songs_root(), "audio")
-    file_path = os.path.join(audio_dir, song_to_delete["file"])
-    if os.path.exists(file_path):
-        os.remove(file_path)
+    file_path = os.path.join(get_songs_root(), "audio", song_to_delete["file"])
+    await asyncio.to_thread(_remove_file, file_path)
 
     # 从索引中移除
-    songs = [s for s in songs if s["id"] != song_id]
-    save_songs_index(songs)
+    async with _index_lock:
+        songs = [s for s in load_songs_index() if s["id"] != song_id]
+        await asyncio.to_thread(save_songs_index, songs)
 
     return {"success": True, "message": f"已删除: {song_to_delete['title']}"}
@@ -0,0 +1,27 @@
+"""SSE 事件编码
+
+对话和视频分析接口共用，事件统一编码为 `data: <JSON>\n\n` 字节。
+"""
+
+import orjson
+
+_SSE_PREFIX = b"data: "
+_SSE_SUFFIX = b"\n\n"
+
+
+def sse_event(payload: dict) -> bytes:
+    """编码一条 SSE 事件（orjson 直接输出 UTF-8 字节，中文不转义，一次拼接）"""
+    return b"".join((_SSE_PREFIX, orjson.dumps(payload), _SSE_SUFFIX))
+
+
+_SSE_TOKEN_PREFIX = b'data: {"type":"token","content":'
+_SSE_TOKEN_SUFFIX = b'}\n\n'
+
+
+def sse_token(content: str) -> bytes:
+    """编码一条 token 事件（最频繁的事件，只序列化文本，不构造字典）"""
+    return b"".join((_SSE_TOKEN_PREFIX, orjson.dumps(content), _SSE_TOKEN_SUFFIX))
+
+
+# 固定内容的完成事件，启动时编码一次
+SSE_DONE = sse_event({'type': 'done'})
@@ -9,14 +9,13 @@ from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage
-import json
 
 from config import get_settings
+from .sse import sse_event, SSE_DONE
 
 router = APIRouter()
 settings = get_settings()
 
-
 class FrameAnalyzeRequest(BaseModel):
     """单帧分析请求"""
     frame: str  # base64 图片
@@ -164,12 +163,12 @@ async def analyze_frame(request: FrameAnalyzeRequest):
 
             async for chunk in stream:
                 if chunk.content:
-                    yield f"data: {json.dumps({'type': 'token', 'content': chunk.content})}\n\n"
+                    yield sse_event({'type': 'token', 'content': chunk.content})
 
-            yield f"data: {json.dumps({'type': 'done'})}\n\n"
+            yield SSE_DONE
 
         except Exception as e:
-            yield f"data: {json.dumps({'type': 'error', 'content': str(e)})}\n\n"
+            yield sse_event({'type': 'error', 'content': str(e)})
 
     return StreamingResponse(
         event_generator(),
@@ -200,12 +199,12 @@ async def analyze_frames(request: FramesAnalyzeRequest):
 
             async for chunk in stream:
                 if chunk.content:
-                    yield f"data: {json.dumps({'type': 'token', 'content': chunk.content})}\n\n"
+                    yield sse_event({'type': 'token', 'content': chunk.content})
 
-            yield f"data: {json.dumps({'type': 'done'})}\n\n"
+            yield SSE_DONE
 
         except Exception as e:
-            yield f"data: {json.dumps({'type': 'error', 'content': str(e)})}\n\n"
+            yield sse_event({'type': 'error', 'content': str(e)})
 
     return StreamingResponse(
         event_generator(),
@@ -259,7 +258,7 @@ async def analyze_video(
         async def event_generator():
             try:
                 # 告知提取了多少帧
-                yield f"data: {json.dumps({'type': 'info', 'content': f'已提取 {len(frames)} 个关键帧，正在分析...'})}\n\n"
+                yield sse_event({'type': 'info', 'content': f'已提取 {len(frames)} 个关键帧，正在分析...'})
 
                 stream = await analyze_with_vision_model(
                     frames=frames,
@@ -269,12 +268,12 @@ async def analyze_video(
 
                 async for chunk in stream:
                     if chunk.content:
-                        yield f"data: {json.dumps({'type': 'token', 'content': chunk.content})}\n\n"
+                        yield sse_event({'type': 'token', 'content': chunk.content})
 
-                yield f"data: {json.dumps({'type': 'done'})}\n\n"
+                yield SSE_DONE
 
             except Exception as e:
-                yield f"data: {json.dumps({'type': 'error', 'content': str(e)})}\n\n"
+                yield sse_event({'type': 'error', 'content': str(e)})
             finally:
                 # 清理临时文件
                 if os.path.exists(tmp_path):
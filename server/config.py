@@ -21,12 +21,25 @@ class Settings(BaseSettings):
     OPENAI_BASE_URL: str = "https://api.siliconflow.cn/v1"
     OPENAI_MODEL: str = "Qwen/Qwen3-30B-A3B-Instruct-2507"
 
+    # 本地意图分类模型（可选，fastText .bin，留空则只用 LLM 识别意图）
+    INTENT_MODEL_PATH: str = ""
+    INTENT_MODEL_THRESHOLD: float = 0.9  # 置信度低于该值时回退到 LLM
+
     # 视觉模型配置（用于图片问答）
     VISION_MODEL: str = "Qwen/Qwen2.5-VL-72B-Instruct"
 
     # ASR 配置 (SiliconFlow SenseVoice)
     ASR_BASE_URL: str = "https://api.siliconflow.cn/v1/audio/transcriptions"
     ASR_MODEL: str = "FunAudioLLM/SenseVoiceSmall"
+    ASR_MAX_BYTES: int = 20 * 1024 * 1024  # 单次上传音频的最大字节数
+    ASR_HEDGE_MS: int = 0  # 云端超过该时间未返回时同时请求本地 ASR，0 表示不启用
+
+    # 本地 ASR 配置（Whisper / FunASR，默认关闭）
+    WHISPER_ENABLED: bool = False
+    WHISPER_MODEL: str = "small"
+    WHISPER_WORKERS: int = 1  # Whisper 推理线程池大小
+    FUNASR_ENABLED: bool = False
+    FUNASR_WORKERS: int = 1  # FunASR 推理线程池大小
 
     # TTS 配置 (SiliconFlow IndexTTS-2 云端)
     TTS_BASE_URL: str = "https://api.siliconflow.cn/v1/audio/speech"
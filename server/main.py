@@ -1,5 +1,7 @@
 """语音助手后端服务入口"""
 
+import asyncio
+import logging
 import uvicorn
 from pathlib import Path
 from contextlib import asynccontextmanager
@@ -10,9 +12,20 @@ from fastapi.responses import FileResponse
 from config import get_settings
 from api import api_router, ws_router
 from agent.skills_loader import discover_skills
+from api.asr import sensevoice, warmup as warmup_asr
 
 settings = get_settings()
 
+# 日志：只配置本项目的 logger（开发环境输出 DEBUG，生产环境只保留 WARNING 以上），
+# 第三方库（sse_starlette、httpx、openai 等）保持默认的 WARNING，避免逐 token 输出日志和对话内容
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+for _logger_name in ("agent", "api"):
+    _app_logger = logging.getLogger(_logger_name)
+    _app_logger.setLevel(logging.DEBUG if settings.DEBUG else logging.WARNING)
+    _app_logger.addHandler(_log_handler)
+    _app_logger.propagate = False
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -21,8 +34,13 @@ async def lifespan(app: FastAPI):
     print("[Server] 正在发现技能...")
     skills = discover_skills()
     print(f"[Server] 已发现 {len(skills)} 个技能")
+    # 后台预加载本地 ASR 模型（未启用时跳过），不阻塞服务启动；保存任务引用防止被回收
+    warmup_task = asyncio.create_task(warmup_asr())
     yield
-    # 关闭时清理（如需要）
+    if not warmup_task.done():
+        warmup_task.cancel()
+    # 关闭时清理：释放共享的 HTTP 连接
+    await sensevoice.close_session()
     print("[Server] 服务关闭")
 
 # 创建 FastAPI 应用
@@ -0,0 +1,6 @@
+"""测试配置：把 server 目录加入导入路径"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
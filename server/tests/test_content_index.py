@@ -0,0 +1,48 @@
+"""内容目录索引刷新测试"""
+
+from agent.tools.content_index import ContentIndex
+
+
+def _make_index(tmp_path):
+    """构建一个记录每次重建结果的索引"""
+    builds = []
+    index = ContentIndex(lambda: str(tmp_path), lambda entries: builds.append(sorted(e.name for e in entries)))
+    return index, builds
+
+
+def test_refresh_is_throttled(tmp_path):
+    """检查间隔内新增的文件要等下一次检查才可见"""
+    (tmp_path / "a.md").write_text("# A", encoding="utf-8")
+    index, builds = _make_index(tmp_path)
+
+    index.refresh()
+    (tmp_path / "b.md").write_text("# B", encoding="utf-8")
+    index.refresh()
+
+    assert builds == [["a.md"]]
+
+
+def test_invalidate_rebuilds_immediately(tmp_path):
+    """invalidate 后下一次 refresh 立即重新扫描"""
+    (tmp_path / "a.md").write_text("# A", encoding="utf-8")
+    (tmp_path / "notes.txt").write_text("x", encoding="utf-8")
+    index, builds = _make_index(tmp_path)
+
+    index.refresh()
+    (tmp_path / "b.md").write_text("# B", encoding="utf-8")
+    index.invalidate()
+    index.refresh()
+
+    assert builds == [["a.md"], ["a.md", "b.md"]]
+
+
+def test_unchanged_directory_is_not_rebuilt(tmp_path):
+    """文件没有变化时不重复重建"""
+    (tmp_path / "a.md").write_text("# A", encoding="utf-8")
+    index, builds = _make_index(tmp_path)
+    index.interval = 0
+
+    index.refresh()
+    index.refresh()
+
+    assert builds == [["a.md"]]
@@ -0,0 +1,35 @@
+"""意图识别中的标题匹配测试"""
+
+import pytest
+
+from agent import intent
+
+
+@pytest.fixture(params=["automaton", "regex"])
+def use_automaton(request, monkeypatch):
+    """分别用 Aho-Corasick 和正则两条路径构建匹配器"""
+    if request.param == "automaton":
+        pytest.importorskip("ahocorasick")
+    else:
+        monkeypatch.setattr(intent, "ahocorasick", None)
+    return request.param
+
+
+@pytest.mark.parametrize("titles", [("小马", "小马过河"), ("小马过河", "小马")])
+def test_find_in_prefers_longest_title(use_automaton, titles):
+    """重叠标题取最长的那个，与标题顺序无关"""
+    matcher = intent.TitleMatcher(titles)
+    assert matcher.find_in("讲小马过河") == "小马过河"
+
+
+def test_find_in_overlapping_suffix(use_automaton):
+    """较短标题先结束时也返回较长的标题"""
+    matcher = intent.TitleMatcher(("过河", "小马过河"))
+    assert matcher.find_in("讲小马过河的故事") == "小马过河"
+
+
+def test_find_in_leftmost_on_ties(use_automaton):
+    """一样长时取最靠前的标题"""
+    matcher = intent.TitleMatcher(("小猪", "小马"))
+    assert matcher.find_in("小马和小猪") == "小马"
+    assert matcher.find_in("讲个故事") is None
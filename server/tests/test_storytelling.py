@@ -0,0 +1,16 @@
+"""故事元数据解析测试"""
+
+from agent.tools import storytelling
+
+
+def test_load_story_meta_crlf(tmp_path, monkeypatch):
+    """CRLF 换行的故事文件也能解析出 frontmatter 和标题"""
+    monkeypatch.setattr(storytelling, "get_stories_dir", lambda: str(tmp_path))
+    content = "---\r\nbgm: forest.mp3\r\n---\r\n\r\n# 小马过河\r\n\r\n从前有一匹小马。\r\n"
+    (tmp_path / "crlf_story.md").write_bytes(content.encode("utf-8"))
+
+    meta = storytelling.load_story_meta("crlf_story")
+    story = storytelling.load_story("crlf_story")
+
+    assert meta == {"id": "crlf_story", "title": "小马过河", "bgm": "forest.mp3"}
+    assert (story["title"], story["bgm"]) == (meta["title"], meta["bgm"])